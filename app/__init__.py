@@ -4,52 +4,122 @@ from flask_migrate import Migrate
 from flask_socketio import SocketIO
 from datetime import datetime
 import os
+from app.utils.socket_queue import socketio_options
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///lostandfound.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///lostandfound.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "dev_secret_key"
 app.config["UPLOAD_FOLDER"] = os.path.join(app.root_path, '..', 'static', 'uploads')
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024
+# Uploads are re-encoded at most this many pixels on the long side, with
+# WebP variants for listings (thumb) and detail pages (medium)
+app.config["IMAGE_MAX_DIMENSION"] = 2048
+app.config["IMAGE_VARIANTS"] = {'thumb': 400, 'medium': 1024}
+app.config["IMAGE_WEBP_QUALITY"] = 80
+app.config["MATCH_INDEX_FOLDER"] = os.path.join(app.instance_path, 'match_index')
+# Load the matching model at import time so a pre-fork server (gunicorn --preload)
+# shares one copy of the weights across its workers
+app.config["PRELOAD_MODELS"] = os.environ.get("PRELOAD_MODELS") == "1"
+# "external" leaves the queue to a separate `flask match-worker` process.
+# "inprocess" runs it as a background task of `python run.py`, for development
+# only: a batch's model and database work blocks the server while it runs.
+app.config["MATCH_WORKER_MODE"] = os.environ.get("MATCH_WORKER_MODE", "external")
+app.config["MATCH_WORKER_BATCH_SIZE"] = 16
+app.config["MATCH_WORKER_POLL_INTERVAL"] = 1.0
+# Navbar data is cached per user and per process; writes invalidate it, the TTL
+# bounds staleness for writes made by other processes
+app.config["HEADER_CACHE_TTL"] = 15
+app.config["NAV_NOTIFICATIONS_LIMIT"] = 6
+# New notifications are pushed to each user's Socket.IO room; those created
+# within the coalesce window go out as one event with at most MAX_ITEMS entries
+app.config["NOTIFICATION_PUSH_COALESCE_SECONDS"] = 0.5
+app.config["NOTIFICATION_PUSH_MAX_ITEMS"] = 6
+app.config["NOTIFICATION_PUSH_EMIT_CHUNK"] = 100
+# An external match worker pushes through SOCKETIO_MESSAGE_QUEUE; without one
+# its notifications cannot reach browsers, so pages poll this often instead
+app.config["NOTIFICATION_POLL_INTERVAL"] = 30
+# Messages per page of chat history, and the most a reconnecting client is
+# sent to catch up on before it has to reload
+app.config["CHAT_PAGE_SIZE"] = 50
+app.config["INBOX_PAGE_SIZE"] = 20
+# The notifications page is paged too, so long histories stay reachable
+app.config["NOTIFICATIONS_PAGE_SIZE"] = 50
+app.config["CHAT_CATCH_UP_LIMIT"] = 200
+# Chat access decisions per (user, post), made at join time and reused for
+# every message. Claim and post changes invalidate them only in the process
+# that committed the change, so the TTL bounds how long another worker keeps
+# accepting messages after a claim is rejected or revoked
+app.config["CHAT_ACCESS_CACHE_TTL"] = 5
+# Write-behind chat: messages are broadcast on arrival and inserted in batches
+# every CHAT_FLUSH_INTERVAL seconds instead of one transaction per message
+app.config["CHAT_WRITE_BEHIND"] = os.environ.get("CHAT_WRITE_BEHIND") == "1"
+app.config["CHAT_FLUSH_INTERVAL"] = 0.005
+app.config["CHAT_FLUSH_MAX_BATCH"] = 200
+# Running several Socket.IO workers: point every worker (and `flask match-worker`)
+# at the same queue so room emits reach clients connected to any of them.
+# redis://, amqp:// and kafka:// URLs use Flask-SocketIO's backends;
+# local://host:port uses the broker started by `flask socket-broker`.
+# The load balancer must pin each client to one worker (sticky sessions, e.g.
+# nginx ip_hash) because the polling transport spreads a session over many
+# requests; clients forced onto the websocket transport do not need it.
+app.config["SOCKETIO_MESSAGE_QUEUE"] = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+app.config["SOCKETIO_CHANNEL"] = os.environ.get("SOCKETIO_CHANNEL", "lostandfound")
+# `flask prune-notifications` archives read notifications older than this, a
+# batch per transaction with a short pause between batches
+app.config["NOTIFICATION_RETENTION_DAYS"] = 90
+app.config["NOTIFICATION_RETENTION_BATCH_SIZE"] = 500
+app.config["NOTIFICATION_RETENTION_PAUSE"] = 0.05
+# Candidate blocking applied in SQL before any embedding work. A category outside
+# every family, or a place outside every location group, is not restricted.
+app.config["MATCH_BLOCKING"] = {
+    'open_only': True,
+    'date_window_days': 90,
+    'category_families': [
+        ['Electronics'],
+        ['Books', 'Documents'],
+        ['Clothing', 'Accessories', 'Bags'],
+        ['Keys', 'Wallets', 'Accessories'],
+    ],
+    # e.g. {'north_campus': ['Library', 'Academic Building']}
+    'location_groups': {},
+}
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
-socketio = SocketIO(app)
+socketio = SocketIO(app, **socketio_options(app.config["SOCKETIO_MESSAGE_QUEUE"],
+                                            app.config["SOCKETIO_CHANNEL"]))
 
 # Ensure uploads directory exists
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
+# {{ image_url(filename, 'thumb') }} picks an upload's resized variant
+from app.utils.image_utils import image_url
+app.add_template_global(image_url)
+
 @app.context_processor
 def inject_common_data():
-    from app.models.notification import Notification
-    from app.models.chat import Chat
+    from app.services.header_service import HeaderService
     notifications = []
     notifications_count = 0
     unread_chats = 0
 
     if 'user_id' in session:
-        # Get all notifications, ordered by created_at
-        notifications = Notification.query.filter_by(
-            user_id=session['user_id']
-        ).order_by(Notification.created_at.desc()).all()
-
-        # Count only unread notifications
-        notifications_count = Notification.query.filter_by(
-            user_id=session['user_id'],
-            is_read=False
-        ).count()
-
-        # Count unread chats
-        unread_chats = Chat.query.filter_by(
-            receiver_id=session['user_id'],
-            is_read=False
-        ).count()
+        # Recent notifications and unread counters, cached per user for a few seconds
+        header = HeaderService().get_header_data(session['user_id'])
+        notifications = header['notifications']
+        notifications_count = header['notifications_count']
+        unread_chats = header['unread_chats']
 
+    from app.services.notification_push_service import NotificationPushService
     return {
         'current_year': datetime.utcnow().year,
         'notifications': notifications,
         'notifications_count': notifications_count,
-        'unread_chats': unread_chats
+        'unread_chats': unread_chats,
+        # Seconds between navbar polls, 0 when new notifications are pushed
+        'notification_poll_interval': 0 if NotificationPushService.pushes_reach_browsers()
+        else app.config["NOTIFICATION_POLL_INTERVAL"]
     }
 
 
@@ -78,9 +148,27 @@ app.register_blueprint(admin_bp, url_prefix='/admin')
 app.register_blueprint(chat_bp, url_prefix='/chat')
 app.register_blueprint(reports_bp, url_prefix='/reports')
 
+if app.config["PRELOAD_MODELS"]:
+    from app.services.model_registry import ModelRegistry
+    from app.services.matching_service import MODEL_NAME
+    ModelRegistry.preload(MODEL_NAME)
+
+# Warn when match jobs are queued and nothing in this process will drain them
+from app.services.match_worker_service import warn_if_queue_unattended
+warn_if_queue_unattended(app)
+
+# Buffered chat messages are written out on SIGTERM under any server, not just run.py
+if app.config["CHAT_WRITE_BEHIND"]:
+    from app.services.chat_write_buffer import flush_on_sigterm
+    flush_on_sigterm()
+
 # Import socket events after socketio initialization
 from app.sockets import socket_events
 
 # Register error handlers
 from app.utils.error_handlers import register_error_handlers
 register_error_handlers(app)
+
+# Register CLI commands
+from app.utils.commands import register_commands
+register_commands(app)
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, session, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, session, jsonify, flash, redirect, url_for, request, current_app
 from app.services.verification_service import VerificationService
 from app.services.chat_service import ChatService
 from app.services.post_service import PostService
 from app.services.user_service import UserService
 from app.utils.decorators import login_required
+from app.utils.pagination import clamp_page_size, page_links
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/chat')
 
@@ -16,10 +17,10 @@ verification_service = VerificationService()
 @chat_bp.route('/inbox')
 @login_required
 def inbox():
-    inbox_items = chat_service.get_inbox_items(session['user_id'])
-    return render_template('chat/inbox.html',
-                         owned_posts=inbox_items['owned_posts'],
-                         other_posts=inbox_items['other_posts'])
+    page = chat_service.get_inbox_page(
+        session['user_id'], request.args.get('cursor'),
+        clamp_page_size(request.args.get('per_page'), default=current_app.config["INBOX_PAGE_SIZE"]))
+    return render_template('chat/inbox.html', threads=page.items, **page_links(page))
 
 @chat_bp.route('/conversation/<int:post_id>')
 @login_required
@@ -31,7 +32,8 @@ def conversation(post_id):
     if not post:
         return jsonify({'error': 'Post not found'}), 404
 
-    chats = chat_service.get_post_chats(post_id, session['user_id'])
+    page = chat_service.get_post_chats_page(
+        post_id, session['user_id'], page_size=current_app.config["CHAT_PAGE_SIZE"])
 
     # Get chat participant info
     if post.user_id == session['user_id']:
@@ -45,8 +47,8 @@ def conversation(post_id):
                 return redirect(url_for('posts.view_post', post_id=post_id))
         else:
             # For lost items, get first chatter
-            other_chatter = next((chat for chat in chats if chat.sender_id != session['user_id']), None)
-            other_user = user_service.get_by_id(other_chatter.sender_id) if other_chatter else None
+            other_chatter_id = chat_service.get_first_other_sender_id(post_id, session['user_id'])
+            other_user = user_service.get_by_id(other_chatter_id) if other_chatter_id else None
     else:
         # If not owner, other user is the post owner
         other_user = user_service.get_by_id(post.user_id)
@@ -60,5 +62,21 @@ def conversation(post_id):
 
     return render_template('chat/conversation.html',
                          post=post,
-                         chats=chats,
+                         chats=page.items,
+                         older_cursor=page.next_cursor,
                          other_user=other_user)
+
+@chat_bp.route('/conversation/<int:post_id>/history')
+@login_required
+def history(post_id):
+    """Older messages for lazy loading, oldest first"""
+    if not chat_service.can_access_chat(session['user_id'], post_id):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    page = chat_service.get_post_chats_page(
+        post_id, session['user_id'], request.args.get('cursor'),
+        clamp_page_size(request.args.get('per_page'), default=current_app.config["CHAT_PAGE_SIZE"]))
+    return jsonify({
+        'messages': [chat_service.serialize_message(chat) for chat in page.items],
+        'next_cursor': page.next_cursor
+    })
@@ -1,10 +1,12 @@
-from flask import Blueprint, render_template, session, redirect, request, url_for, flash
+from flask import Blueprint, render_template, session, redirect, request, url_for, flash, current_app, jsonify
 from app.services.dashboard_service import DashboardService
 from app.services.user_service import UserService
 from app.services.post_service import PostService
 from app.services.notification_service import NotificationService
 from app.services.verification_service import VerificationService
+from app.services.header_service import HeaderService
 from app.utils.decorators import login_required
+from app.utils.pagination import clamp_page_size, page_links
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -53,8 +55,25 @@ def clear_notifications():
 @dashboard_bp.route("/notifications")
 @login_required
 def notifications():
-    notifications = notification_service.get_user_notifications(session['user_id'])
-    return render_template('notifications.html', notifications=notifications)
+    page = notification_service.get_notifications_page(
+        session['user_id'], request.args.get('cursor'),
+        clamp_page_size(request.args.get('per_page'), default=current_app.config["NOTIFICATIONS_PAGE_SIZE"]))
+    return render_template('notifications.html', notifications=page.items, **page_links(page))
+
+@dashboard_bp.route("/notifications/header")
+@login_required
+def notifications_header():
+    """Navbar notifications and badges, for pages that poll instead of receiving pushes"""
+    header = HeaderService().get_header_data(session['user_id'])
+    return jsonify({
+        'notifications': [
+            {**notification, 'created_at': notification['created_at'].strftime('%Y-%m-%d %H:%M')
+             if notification['created_at'] else None}
+            for notification in header['notifications']
+        ],
+        'notifications_count': header['notifications_count'],
+        'unread_chats': header['unread_chats'],
+    })
 
 @dashboard_bp.route("/notifications/mark-all-read")
 @login_required
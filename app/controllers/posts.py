@@ -3,8 +3,8 @@ from app.services.post_service import PostService
 from app.services.search_service import SearchService
 from app.services.verification_service import VerificationService
 from app.utils.decorators import login_required, user_only
-from app.utils.image_utils import save_image
 from app.services.social_media_service import SocialMediaService
+from app.utils.pagination import clamp_page_size, page_links
 
 posts_bp = Blueprint("posts", __name__)
 post_service = PostService()
@@ -16,15 +16,19 @@ verification_service = VerificationService()
 @posts_bp.route("/lost-items")
 @login_required
 def lost_items():
-    items = post_service.get_all_lost_items()
-    return render_template("lost_items.html", items=items)
+    page = post_service.get_lost_items_page(
+        request.args.get("cursor"), clamp_page_size(request.args.get("per_page"))
+    )
+    return render_template("lost_items.html", items=page.items, **page_links(page))
 
 
 @posts_bp.route("/found-items")
 @login_required
 def found_items():
-    items = post_service.get_all_found_items()
-    return render_template("found_items.html", items=items)
+    page = post_service.get_found_items_page(
+        request.args.get("cursor"), clamp_page_size(request.args.get("per_page"))
+    )
+    return render_template("found_items.html", items=page.items, **page_links(page))
 
 
 @posts_bp.route("/report-lost-item", methods=["GET", "POST"])
@@ -81,22 +85,28 @@ def view_post(post_id):
 @posts_bp.route("/user-posts")
 @login_required
 def user_posts():
-    posts = post_service.get_by_user_id(session["user_id"])
-    return render_template("user_posts.html", posts=posts)
+    page = post_service.get_page_by_user_id(
+        session["user_id"], request.args.get("cursor"), clamp_page_size(request.args.get("per_page"))
+    )
+    return render_template("user_posts.html", posts=page.items, **page_links(page))
 
 
 @posts_bp.route("/my-lost-items")
 @login_required
 def my_lost_items():
-    posts = post_service.get_by_type_and_user("lost", session["user_id"])
-    return render_template("user_posts.html", posts=posts, type="lost")
+    page = post_service.get_page_by_type_and_user(
+        "lost", session["user_id"], request.args.get("cursor"), clamp_page_size(request.args.get("per_page"))
+    )
+    return render_template("user_posts.html", posts=page.items, type="lost", **page_links(page))
 
 
 @posts_bp.route("/my-found-items")
 @login_required
 def my_found_items():
-    posts = post_service.get_by_type_and_user("found", session["user_id"])
-    return render_template("user_posts.html", posts=posts, type="found")
+    page = post_service.get_page_by_type_and_user(
+        "found", session["user_id"], request.args.get("cursor"), clamp_page_size(request.args.get("per_page"))
+    )
+    return render_template("user_posts.html", posts=page.items, type="found", **page_links(page))
 
 
 @posts_bp.route("/post/<int:post_id>/edit", methods=["GET", "POST"])
@@ -114,17 +124,8 @@ def edit_post(post_id):
             post.category_name = request.form.get("category")
             post.location = request.form.get("location")
 
-            if "images" in request.files:
-                images = []
-                for file in request.files.getlist("images"):
-                    if file.filename:
-                        filename = save_image(file)
-                        if filename:
-                            images.append(filename)
-                if images:
-                    post.images = ",".join(images)
-
-            post_service.update(post)
+            # New uploads replace the post's images and release the old ones
+            post_service.update(post, files=request.files)
             flash("Post updated successfully", "success")
             return redirect(url_for("posts.view_post", post_id=post.id))
         except Exception as e:
@@ -174,11 +175,14 @@ def search():
     print("Search query:", query)
     print("Applied filters:", filters)
 
-    results = search_service.search_posts(query, filters)
+    page = search_service.search_posts_page(
+        query, filters, request.args.get("cursor"), clamp_page_size(request.args.get("per_page"))
+    )
     return render_template(
         "search_results.html",
         query=query,
-        results=results,
+        results=page.items,
+        **page_links(page),
         type=filters.get("type", ""),
         category=filters.get("category", ""),
         location=filters.get("location", ""),
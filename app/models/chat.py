@@ -1,4 +1,4 @@
-from app import db, socketio
+from app import db
 from datetime import datetime
 
 class Chat(db.Model):
@@ -9,31 +9,23 @@ class Chat(db.Model):
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_read = db.Column(db.Boolean, default=False)
+    # Set on write-behind messages, which are broadcast before they have an id;
+    # a reconnecting client matches replayed rows to its copies by it
+    client_id = db.Column(db.String(32))
 
     # Relationships
     post = db.relationship('Post', backref='chats')
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_chats')
     receiver = db.relationship('User', foreign_keys=[receiver_id], backref='received_chats')
 
+    __table_args__ = (
+        db.Index('ix_chat_receiver_id_is_read', 'receiver_id', 'is_read'),
+        db.Index('ix_chat_post_id_created_at', 'post_id', 'created_at'),
+        db.Index('ix_chat_sender_id', 'sender_id'),
+    )
+
     @classmethod
     def mark_messages_read(cls, post_id, user_id):
         """Class method to mark messages as read and emit the update"""
-        messages = cls.query.filter_by(
-            post_id=post_id,
-            receiver_id=user_id,
-            is_read=False
-        ).all()
-
-        if messages:
-            for message in messages:
-                message.is_read = True
-            db.session.commit()
-
-            # Emit to all clients in the room
-            socketio.emit('messages_read', {
-                'post_id': post_id,
-                'reader_id': user_id,
-                'room': f'post_{post_id}'
-            })
-
-        return len(messages)
+        from app.repositories.chat_repository import ChatRepository
+        return ChatRepository.mark_messages_read(post_id, user_id)
@@ -0,0 +1,9 @@
+from app import db
+
+class ClaimProofFile(db.Model):
+    """A supporting document uploaded with a verification claim"""
+    __tablename__ = 'claim_proof_file'
+
+    id = db.Column(db.Integer, primary_key=True)
+    claim_id = db.Column(db.Integer, db.ForeignKey('verification_claim.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
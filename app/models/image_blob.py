@@ -0,0 +1,11 @@
+from app import db
+from datetime import datetime
+
+class ImageBlob(db.Model):
+    """One stored upload, named by the SHA-256 of its bytes, and how many
+    posts and claim proofs use it; the file goes when the count reaches 0"""
+    __tablename__ = 'image_blob'
+
+    filename = db.Column(db.String(100), primary_key=True)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+class MatchJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, running, failed
+    attempts = db.Column(db.Integer, default=0)
+    claimed_by = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_match_job_status_id', 'status', 'id'),
+    )
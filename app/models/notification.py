@@ -11,3 +11,8 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref=db.backref('notifications', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_notification_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notification_is_read_created_at', 'is_read', 'created_at'),
+    )
@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class NotificationArchive(db.Model):
+    """Notifications moved out of the live table by the retention job"""
+    __tablename__ = 'notification_archive'
+
+    # Keeps the id the row had in `notification`
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.String(500), nullable=False)
+    link = db.Column(db.String(200))
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reason = db.Column(db.String(20))  # expired, collapsed
+
+    __table_args__ = (
+        db.Index('ix_notification_archive_user_id_created_at', 'user_id', 'created_at'),
+    )
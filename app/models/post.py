@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import event, DDL
 
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -18,3 +19,38 @@ class Post(db.Model):
     item_name = db.Column(db.String(100))
     contact_method = db.Column(db.String(50))
     verification_claims = db.relationship("VerificationClaim", backref="post", lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_post_type_post_date', 'type', 'post_date'),
+        db.Index('ix_post_user_id_type', 'user_id', 'type'),
+        db.Index('ix_post_post_date', 'post_date'),
+    )
+
+
+# Full-text index over the searchable post columns, kept in sync by triggers.
+# Created alongside the post table; existing databases get it from the
+# matching migration.
+POST_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+        item_name, description, category_name, location,
+        content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN
+        INSERT INTO post_fts(rowid, item_name, description, category_name, location)
+        VALUES (new.id, new.item_name, new.description, new.category_name, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, item_name, description, category_name, location)
+        VALUES ('delete', old.id, old.item_name, old.description, old.category_name, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_au
+    AFTER UPDATE OF item_name, description, category_name, location ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, item_name, description, category_name, location)
+        VALUES ('delete', old.id, old.item_name, old.description, old.category_name, old.location);
+        INSERT INTO post_fts(rowid, item_name, description, category_name, location)
+        VALUES (new.id, new.item_name, new.description, new.category_name, new.location);
+    END""",
+]
+
+for statement in POST_FTS_DDL:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+import numpy as np
+
+class PostEmbedding(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), unique=True, nullable=False)
+    model_name = db.Column(db.String(100), nullable=False)
+    text_hash = db.Column(db.String(40), nullable=False)
+    dimensions = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    post = db.relationship(
+        'Post',
+        backref=db.backref('embedding', uselist=False, cascade='all, delete-orphan')
+    )
+
+    def to_vector(self):
+        """Return the stored embedding as a float32 numpy array"""
+        return np.frombuffer(self.vector, dtype=np.float32)
+
+    def set_vector(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        self.dimensions = int(vector.shape[0])
+        self.vector = vector.tobytes()
@@ -10,6 +10,10 @@ class User(db.Model):
     is_banned = db.Column(db.Boolean, default=False)
     contact_info = db.Column(db.String(200))
     contribution = db.Column(db.Integer, default=0)
+    # Denormalized badge counters, kept in step by the notification and chat
+    # repositories; `flask reconcile-unread-counters` repairs drift
+    unread_notifications_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    unread_chats_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     posts = db.relationship("Post", backref="user", lazy=True)
     reported_by = db.relationship(
         "UserReport",
@@ -1,5 +1,7 @@
+import json
 from app import db
-from datetime import datetime
+from app.models.claim_proof_file import ClaimProofFile
+from datetime import datetime, date
 from sqlalchemy import event
 
 class VerificationClaim(db.Model):
@@ -7,10 +9,59 @@ class VerificationClaim(db.Model):
     post_id = db.Column(db.Integer, db.ForeignKey("post.id"))
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     status = db.Column(db.String(50), default="pending")
-    proof_details = db.Column(db.String(1000))
+    # Proof the claimant gave; uploaded documents live in claim_proof_file
+    lost_location = db.Column(db.String(200))
+    lost_date = db.Column(db.Date)
+    unique_identifier = db.Column(db.String(500))
+    additional_proof = db.Column(db.String(1000))
     submission_date = db.Column(db.DateTime, default=datetime.utcnow)
     verification_score = db.Column(db.Float, default=0.0)
+    # Set by ClaimScoringService; NULL means the claim is waiting to be scored
+    scored_at = db.Column(db.DateTime)
     user = db.relationship("User", backref="verification_claims", foreign_keys=[user_id])
+    proof_files = db.relationship("ClaimProofFile", order_by=ClaimProofFile.id,
+                                  cascade="all, delete-orphan", lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_verification_claim_post_id_user_id_status', 'post_id', 'user_id', 'status'),
+        db.Index('ix_verification_claim_post_id_verification_score', 'post_id', 'verification_score'),
+        db.Index('ix_verification_claim_scored_at', 'scored_at'),
+    )
+
+    @property
+    def proof_data(self):
+        """The proof as the dict once stored as JSON in proof_details"""
+        return {
+            'lost_location': self.lost_location,
+            'lost_date': self.lost_date.isoformat() if self.lost_date else None,
+            'unique_identifier': self.unique_identifier,
+            'additional_proof': self.additional_proof,
+            'proof_files': [proof_file.filename for proof_file in self.proof_files],
+        }
+
+    @property
+    def proof_details(self):
+        """Compatibility accessor for the old JSON column"""
+        return json.dumps(self.proof_data)
+
+    @proof_details.setter
+    def proof_details(self, value):
+        data = json.loads(value) if value else {}
+        self.lost_location = data.get('lost_location')
+        self.lost_date = parse_lost_date(data.get('lost_date'))
+        self.unique_identifier = data.get('unique_identifier')
+        self.additional_proof = data.get('additional_proof')
+        self.proof_files = [ClaimProofFile(filename=filename) for filename in data.get('proof_files') or []]
+
+
+def parse_lost_date(value):
+    """A form or legacy JSON date (YYYY-MM-DD); None if missing or malformed"""
+    if not value or isinstance(value, date):
+        return value or None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
 
 @event.listens_for(VerificationClaim.status, 'set')
 def increment_contribution_on_approve(target, value, oldvalue, initiator):
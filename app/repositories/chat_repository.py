@@ -1,22 +1,94 @@
+from collections import Counter
 from app.models.chat import Chat
 from app.models.post import Post
+from app.models.user import User
 from app.models.verificationClaim import VerificationClaim
-from app import db
-from sqlalchemy import or_, and_
+from app.repositories.user_repository import UserRepository
+from app.utils.header_cache import mark_dirty
+from app.utils.pagination import keyset_paginate
+from app import db, socketio
+from sqlalchemy import or_, and_, insert, func, case
+from sqlalchemy.orm import aliased
 
 class ChatRepository:
+    # Newest first; a page is reversed for display
+    PAGE_KEYS = [(Chat.created_at, True), (Chat.id, True)]
+
     @staticmethod
-    def get_post_chats(post_id, user_id):
+    def _post_chats_query(post_id, user_id):
         return Chat.query.filter(
             Chat.post_id == post_id,
             or_(Chat.sender_id == user_id, Chat.receiver_id == user_id)
-        ).order_by(Chat.created_at).all()
+        )
 
     @staticmethod
-    def get_posts_with_chats(user_id):
-        return db.session.query(Post).join(Chat).filter(
-            or_(Chat.sender_id == user_id, Chat.receiver_id == user_id)
-        ).distinct().all()
+    def get_post_chats(post_id, user_id):
+        return ChatRepository._post_chats_query(post_id, user_id).order_by(Chat.created_at).all()
+
+    @staticmethod
+    def page_post_chats(post_id, user_id, cursor=None, page_size=50):
+        """The newest page of a conversation, or the page older than `cursor`"""
+        return keyset_paginate(ChatRepository._post_chats_query(post_id, user_id),
+                               ChatRepository.PAGE_KEYS, cursor, page_size)
+
+    @staticmethod
+    def get_post_chats_since(post_id, user_id, last_id, limit):
+        """Messages after `last_id`, oldest first, at most `limit` of them"""
+        return (ChatRepository._post_chats_query(post_id, user_id)
+                .filter(Chat.id > last_id)
+                .order_by(Chat.id)
+                .limit(limit)
+                .all())
+
+    @staticmethod
+    def get_first_other_sender_id(post_id, user_id):
+        """Who first wrote to `user_id` about a post, if anyone"""
+        row = (ChatRepository._post_chats_query(post_id, user_id)
+               .filter(Chat.sender_id != user_id)
+               .with_entities(Chat.sender_id)
+               .order_by(Chat.created_at)
+               .first())
+        return row.sender_id if row else None
+
+    @staticmethod
+    def page_inbox(user_id, cursor=None, page_size=20):
+        """One row per conversation the user is in, most recently active first.
+
+        Each row carries the post summary, the post owner's and the other
+        participant's names, the last message and the user's unread count,
+        all from a single grouped statement.
+        """
+        threads = (db.session.query(
+                Chat.post_id.label('post_id'),
+                func.max(Chat.id).label('last_id'),
+                func.sum(case((and_(Chat.receiver_id == user_id, Chat.is_read == False), 1),
+                              else_=0)).label('unread'))
+            .filter(or_(Chat.sender_id == user_id, Chat.receiver_id == user_id))
+            .group_by(Chat.post_id)
+            .subquery())
+        last = aliased(Chat)
+        owner = aliased(User)
+        other = aliased(User)
+        other_id = case((last.sender_id == user_id, last.receiver_id), else_=last.sender_id)
+
+        query = (db.session.query(
+                Post.id.label('post_id'),
+                Post.item_name,
+                Post.type,
+                Post.user_id.label('owner_id'),
+                owner.name.label('owner_name'),
+                other.id.label('other_user_id'),
+                other.name.label('other_user_name'),
+                last.message.label('last_message'),
+                last.sender_id.label('last_sender_id'),
+                last.created_at.label('last_message_at'),
+                threads.c.unread)
+            .select_from(threads)
+            .join(last, last.id == threads.c.last_id)
+            .join(Post, Post.id == threads.c.post_id)
+            .join(owner, owner.id == Post.user_id)
+            .join(other, other.id == other_id))
+        return keyset_paginate(query, [(threads.c.last_id, True)], cursor, page_size)
 
     @staticmethod
     def get_verification_claim(post_id, status='approved'):
@@ -27,22 +99,33 @@ class ChatRepository:
 
     @staticmethod
     def get_unread_messages_count(user_id):
-        return Chat.query.filter_by(receiver_id=user_id, is_read=False).count()
+        return UserRepository.get_unread_counts(user_id)[1]
 
     @staticmethod
     def mark_messages_read(post_id, user_id):
-        messages = Chat.query.filter_by(
+        """Mark a user's unread messages on a post as read in one UPDATE.
+
+        Returns the number of messages flipped and emits `messages_read` to
+        the post's room when there were any.
+        """
+        count = Chat.query.filter_by(
             post_id=post_id,
             receiver_id=user_id,
             is_read=False
-        ).all()
+        ).update({Chat.is_read: True}, synchronize_session=False)
 
-        if messages:
-            for message in messages:
-                message.is_read = True
+        if count:
+            UserRepository.adjust_unread_counts(user_id, chats=-count)
+            mark_dirty(user_id)
             db.session.commit()
 
-        return len(messages)
+            socketio.emit('messages_read', {
+                'post_id': post_id,
+                'reader_id': user_id,
+                'count': count
+            }, room=f'post_{post_id}')
+
+        return count
 
     @staticmethod
     def create_message(post_id, sender_id, receiver_id, message_text):
@@ -54,5 +137,21 @@ class ChatRepository:
             message=message_text
         )
         db.session.add(message)
+        UserRepository.adjust_unread_counts(receiver_id, chats=1)
         db.session.commit()
         return message
+
+    @staticmethod
+    def create_messages(rows):
+        """Insert many messages in one transaction; returns their ids in `rows` order"""
+        if not rows:
+            return []
+        ids = [row.id for row in db.session.execute(
+            insert(Chat).returning(Chat.id, sort_by_parameter_order=True), rows)]
+        unread = Counter(row['receiver_id'] for row in rows)
+        for receiver_id, count in unread.items():
+            UserRepository.adjust_unread_counts(receiver_id, chats=count)
+            # Bulk inserts bypass the ORM events that keep the header cache fresh
+            mark_dirty(receiver_id)
+        db.session.commit()
+        return ids
@@ -0,0 +1,55 @@
+from app.models.post_embedding import PostEmbedding
+from app.models.post import Post
+from app import db
+
+class EmbeddingRepository:
+    def get_by_post_id(self, post_id):
+        """Get the stored embedding for a post"""
+        return PostEmbedding.query.filter_by(post_id=post_id).first()
+
+    def get_by_post_ids(self, post_ids):
+        """Get stored embeddings for many posts, keyed by post ID"""
+        if not post_ids:
+            return {}
+        embeddings = PostEmbedding.query.filter(PostEmbedding.post_id.in_(post_ids)).all()
+        return {embedding.post_id: embedding for embedding in embeddings}
+
+    def get_changed_since(self, post_type, model_name, since=None):
+        """Embeddings of a post type written at or after `since` (all when None), oldest first"""
+        query = PostEmbedding.query.join(Post).filter(
+            Post.type == post_type, PostEmbedding.model_name == model_name)
+        if since is not None:
+            query = query.filter(PostEmbedding.updated_at >= since)
+        return query.order_by(PostEmbedding.updated_at).all()
+
+    def update(self, embedding, model_name, text_hash, vector, commit=True):
+        """Overwrite an embedding with a freshly encoded vector"""
+        embedding.model_name = model_name
+        embedding.text_hash = text_hash
+        embedding.set_vector(vector)
+        if commit:
+            db.session.commit()
+        return embedding
+
+    def create(self, post_id, model_name, text_hash, vector, commit=True):
+        """Store the embedding for a post that has none yet"""
+        embedding = PostEmbedding(post_id=post_id)
+        db.session.add(embedding)
+        return self.update(embedding, model_name, text_hash, vector, commit)
+
+    def upsert(self, post_id, model_name, text_hash, vector, commit=True):
+        """Create or replace the embedding for a post"""
+        embedding = self.get_by_post_id(post_id)
+        if embedding:
+            return self.update(embedding, model_name, text_hash, vector, commit)
+        return self.create(post_id, model_name, text_hash, vector, commit)
+
+    def save_all(self):
+        """Save all pending embedding changes"""
+        try:
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error saving embeddings: {e}")
+            return False
@@ -0,0 +1,78 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from app.models.image_blob import ImageBlob
+from app.models.claim_proof_file import ClaimProofFile
+from app.models.post import Post
+from app import db
+from sqlalchemy.dialects.sqlite import insert
+
+class ImageRepository:
+    @staticmethod
+    def add_reference(filename):
+        """Count one more user of a stored image, creating its row if needed"""
+        now = datetime.utcnow()
+        statement = insert(ImageBlob).values(filename=filename, ref_count=1, updated_at=now)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[ImageBlob.filename],
+            set_={'ref_count': ImageBlob.ref_count + 1, 'updated_at': now}))
+        db.session.commit()
+
+    @staticmethod
+    def release(filenames):
+        """Drop one reference per name; returns the names no longer referenced.
+
+        Their rows are deleted in the same transaction, so a concurrent upload
+        of the same bytes starts a fresh row. Names without a row (files that
+        were never counted) are left alone.
+        """
+        counts = Counter(name for name in filenames if name)
+        if not counts:
+            return []
+        now = datetime.utcnow()
+        for filename, count in counts.items():
+            ImageBlob.query.filter_by(filename=filename).update(
+                {ImageBlob.ref_count: ImageBlob.ref_count - count, ImageBlob.updated_at: now},
+                synchronize_session=False)
+        unused = [row.filename for row in ImageBlob.query
+                  .filter(ImageBlob.filename.in_(list(counts)), ImageBlob.ref_count <= 0)
+                  .with_entities(ImageBlob.filename)]
+        if unused:
+            ImageBlob.query.filter(ImageBlob.filename.in_(unused)).delete(synchronize_session=False)
+        db.session.commit()
+        return unused
+
+    @staticmethod
+    def is_referenced(filename):
+        return db.session.get(ImageBlob, filename) is not None
+
+    @staticmethod
+    def reconcile(grace_seconds):
+        """Recount references from posts and claim proofs.
+
+        Returns (corrected, unused): rows whose count drifted, and names left
+        with no reference, whose rows are deleted. Rows touched within
+        `grace_seconds` are skipped, since an upload takes its reference
+        before the post or claim naming it is saved.
+        """
+        actual = Counter()
+        for (images,) in db.session.query(Post.images).filter(Post.images.isnot(None)):
+            actual.update(name for name in images.split(',') if name)
+        actual.update(filename for (filename,) in db.session.query(ClaimProofFile.filename))
+
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        corrected = 0
+        unused = []
+        for blob in ImageBlob.query.filter(ImageBlob.updated_at < cutoff):
+            if not actual[blob.filename]:
+                unused.append(blob.filename)
+                db.session.delete(blob)
+            elif blob.ref_count != actual[blob.filename]:
+                blob.ref_count = actual[blob.filename]
+                corrected += 1
+        known = {filename for (filename,) in db.session.query(ImageBlob.filename)}
+        for filename, count in actual.items():
+            if filename not in known:
+                db.session.add(ImageBlob(filename=filename, ref_count=count))
+                corrected += 1
+        db.session.commit()
+        return corrected, unused
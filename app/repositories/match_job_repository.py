@@ -0,0 +1,67 @@
+from app.models.match_job import MatchJob
+from app import db
+from sqlalchemy import select, update, func
+from datetime import datetime, timedelta
+
+class MatchJobRepository:
+    MAX_ATTEMPTS = 3
+
+    def enqueue(self, post_id):
+        """Queue a post for matching unless it is already waiting"""
+        job = MatchJob.query.filter_by(post_id=post_id, status='pending').first()
+        if job:
+            return job
+        job = MatchJob(post_id=post_id)
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def claim_batch(self, worker_id, limit):
+        """Atomically move up to `limit` pending jobs to running for one worker"""
+        pending_ids = (select(MatchJob.id)
+                       .where(MatchJob.status == 'pending')
+                       .order_by(MatchJob.id)
+                       .limit(limit)
+                       .scalar_subquery())
+        db.session.execute(
+            update(MatchJob)
+            .where(MatchJob.id.in_(pending_ids), MatchJob.status == 'pending')
+            .values(status='running', claimed_by=worker_id,
+                    claimed_at=datetime.utcnow(), attempts=MatchJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return MatchJob.query.filter_by(claimed_by=worker_id, status='running').all()
+
+    def complete(self, jobs):
+        """Finished jobs are removed so the queue only holds outstanding work"""
+        if not jobs:
+            return
+        MatchJob.query.filter(MatchJob.id.in_([job.id for job in jobs])).delete(
+            synchronize_session=False)
+        db.session.commit()
+
+    def fail(self, job, error):
+        """Return a job to the queue, or park it as failed after MAX_ATTEMPTS"""
+        job.status = 'failed' if job.attempts >= self.MAX_ATTEMPTS else 'pending'
+        job.last_error = str(error)[:500]
+        db.session.commit()
+        return job
+
+    def release_stale(self, older_than_seconds):
+        """Requeue running jobs whose worker died before finishing them"""
+        cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+        count = MatchJob.query.filter(
+            MatchJob.status == 'running',
+            MatchJob.claimed_at < cutoff
+        ).update({'status': 'pending'}, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def delete_for_post(self, post_id):
+        MatchJob.query.filter_by(post_id=post_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    def count_by_status(self):
+        rows = db.session.query(MatchJob.status, func.count(MatchJob.id)).group_by(MatchJob.status)
+        return dict(rows.all())
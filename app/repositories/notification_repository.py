@@ -1,29 +1,84 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert, select, func, literal
+from sqlalchemy.orm import aliased
 from app.models.notification import Notification
+from app.models.notification_archive import NotificationArchive
+from app.repositories.user_repository import UserRepository
 from app import db
+from app.utils.header_cache import mark_dirty
+from app.utils.notification_push import push_after_commit
+from app.utils.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
 
 class NotificationRepository:
+    # The notifications page is newest first; id breaks ties so cursors are stable
+    PAGE_KEYS = [(Notification.created_at, True), (Notification.id, True)]
+
     def get_by_id(self, notification_id):
         """Get notification by ID"""
         return Notification.query.get(notification_id)
 
-    def get_user_notifications(self, user_id, limit=None):
-        """Get notifications for a user"""
-        query = Notification.query.filter_by(user_id=user_id)
-        if limit:
-            query = query.limit(limit)
-        return query.all()
+    def page_user_notifications(self, user_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        """One page of a user's notifications, newest first"""
+        return keyset_paginate(Notification.query.filter_by(user_id=user_id),
+                               self.PAGE_KEYS, cursor, page_size)
+
+    def get_recent(self, user_id, limit):
+        """Newest notifications for a user, bounded by `limit`"""
+        return (Notification.query
+                .filter_by(user_id=user_id)
+                .order_by(Notification.created_at.desc())
+                .limit(limit)
+                .all())
+
+    def get_unread_counts(self, user_id):
+        """Unread notification and unread chat counts from the user's counters"""
+        return UserRepository.get_unread_counts(user_id)
 
     def create(self, data):
         """Create a new notification"""
         notification = Notification(**data)
         db.session.add(notification)
+        if not notification.is_read:
+            UserRepository.adjust_unread_counts(notification.user_id, notifications=1)
+        # Flush for the id and created_at the push payload carries
+        db.session.flush()
+        push_after_commit([notification])
         db.session.commit()
         return notification
 
+    def create_many(self, rows):
+        """Insert many notifications with one executemany; returns how many were inserted.
+
+        Used for fan-out, where building an ORM object per recipient only to
+        flush it straight away is wasted work. Header caches and unread
+        counters are updated here because the ORM events do not see the insert.
+        """
+        rows = [{'is_read': False, **row} for row in rows]
+        if not rows:
+            return 0
+        inserted = db.session.execute(
+            insert(Notification).returning(Notification.id, Notification.created_at,
+                                           sort_by_parameter_order=True),
+            rows)
+        for row, (notification_id, created_at) in zip(rows, inserted):
+            row.update(id=notification_id, created_at=created_at)
+        push_after_commit(row for row in rows if not row['is_read'])
+        unread = Counter(row['user_id'] for row in rows if not row['is_read'])
+        for user_id, count in unread.items():
+            UserRepository.adjust_unread_counts(user_id, notifications=count)
+        for user_id in {row['user_id'] for row in rows}:
+            mark_dirty(user_id)
+        db.session.commit()
+        return len(rows)
+
     def mark_as_read(self, notification_id):
         """Mark notification as read"""
         notification = self.get_by_id(notification_id)
         if notification:
+            if not notification.is_read:
+                UserRepository.adjust_unread_counts(notification.user_id, notifications=-1)
             notification.is_read = True
             db.session.commit()
         return notification
@@ -31,6 +86,8 @@ class NotificationRepository:
     def delete_user_notifications(self, user_id):
         """Delete all notifications for a user"""
         Notification.query.filter_by(user_id=user_id).delete()
+        UserRepository.reset_unread_notifications(user_id)
+        mark_dirty(user_id)
         db.session.commit()
 
     def save_all(self):
@@ -46,6 +103,8 @@ class NotificationRepository:
     def delete(self, notification):
         """Delete a specific notification"""
         try:
+            if not notification.is_read:
+                UserRepository.adjust_unread_counts(notification.user_id, notifications=-1)
             db.session.delete(notification)
             db.session.commit()
             return True
@@ -55,14 +114,72 @@ class NotificationRepository:
             return False
 
     def mark_all_read(self, user_id):
-        """Mark all notifications as read for a user"""
+        """Mark all notifications as read for a user in one UPDATE; returns the row count"""
         try:
-            notifications = Notification.query.filter_by(user_id=user_id, is_read=False).all()
-            for notification in notifications:
-                notification.is_read = True
+            count = Notification.query.filter_by(user_id=user_id, is_read=False).update(
+                {Notification.is_read: True}, synchronize_session=False)
+            UserRepository.reset_unread_notifications(user_id)
+            mark_dirty(user_id)
             db.session.commit()
-            return True
+            return count
         except Exception as e:
             db.session.rollback()
             print(f"Error marking all notifications as read: {e}")
-            return False
+            return 0
+
+    def get_expired_ids(self, cutoff, limit):
+        """Oldest read notifications created before `cutoff`"""
+        rows = (db.session.query(Notification.id)
+                .filter(Notification.is_read == True, Notification.created_at < cutoff)
+                .order_by(Notification.created_at)
+                .limit(limit)
+                .all())
+        return [row.id for row in rows]
+
+    def get_superseded_ids(self, title, limit):
+        """Notifications with `title` that have a newer one for the same user and link"""
+        newer = aliased(Notification)
+        rows = (db.session.query(Notification.id)
+                .filter(Notification.title == title)
+                .filter(select(newer.id)
+                        .where(newer.user_id == Notification.user_id,
+                               newer.link == Notification.link,
+                               newer.title == title,
+                               newer.id > Notification.id)
+                        .exists())
+                .order_by(Notification.id)
+                .limit(limit)
+                .all())
+        return [row.id for row in rows]
+
+    def archive(self, ids, reason):
+        """Move notifications to the archive table in one short transaction"""
+        if not ids:
+            return 0
+        try:
+            columns = ['id', 'user_id', 'title', 'message', 'link', 'is_read', 'created_at']
+            db.session.execute(insert(NotificationArchive).from_select(
+                columns + ['archived_at', 'reason'],
+                select(*[getattr(Notification, column) for column in columns],
+                       literal(datetime.utcnow()), literal(reason))
+                .where(Notification.id.in_(ids))
+            ))
+
+            unread = (db.session.query(Notification.user_id, func.count(Notification.id))
+                      .filter(Notification.id.in_(ids), Notification.is_read == False)
+                      .group_by(Notification.user_id)
+                      .all())
+            for user_id, count in unread:
+                UserRepository.adjust_unread_counts(user_id, notifications=-count)
+
+            user_ids = [row.user_id for row in
+                        db.session.query(Notification.user_id).filter(Notification.id.in_(ids)).distinct()]
+            count = Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+            for user_id in user_ids:
+                mark_dirty(user_id)
+            db.session.commit()
+            return count
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error archiving notifications: {e}")
+            return 0
@@ -1,18 +1,56 @@
 from app.models.post import Post
 from app import db
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, text, Integer, Float
+from sqlalchemy.exc import OperationalError
 from datetime import datetime
+import re
+from app.utils.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
 
 
 class PostRepository:
+    # Listings are ordered newest first; id breaks ties so cursors are stable
+    PAGE_KEYS = [(Post.post_date, True), (Post.id, True)]
+
     def get_by_type(self, type_name):
         return (
             Post.query.filter_by(type=type_name).order_by(Post.post_date.desc()).all()
         )
 
+    def page_by_type(self, type_name, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return keyset_paginate(Post.query.filter_by(type=type_name), self.PAGE_KEYS, cursor, page_size)
+
     def get_by_id(self, post_id):
         return Post.query.get_or_404(post_id)
 
+    def get_by_ids(self, post_ids):
+        if not post_ids:
+            return []
+        return Post.query.filter(Post.id.in_(list(post_ids))).all()
+
+    def get_ids_by_type(self, type_name):
+        return [row.id for row in Post.query.with_entities(Post.id).filter_by(type=type_name)]
+
+    def get_candidate_ids(self, type_name, open_only=True, date_from=None, date_to=None,
+                          categories=None, location_keywords=None):
+        """IDs of match candidates of a type, narrowed by the blocking rules"""
+        query = Post.query.with_entities(Post.id).filter(Post.type == type_name)
+        if open_only:
+            query = query.filter(Post.status == True)
+        if date_from:
+            query = query.filter(Post.lOrF_date >= date_from)
+        if date_to:
+            query = query.filter(Post.lOrF_date <= date_to)
+        if categories:
+            query = query.filter(Post.category_name.in_(categories))
+        if location_keywords:
+            query = query.filter(
+                or_(*[Post.location.ilike(f"%{keyword}%") for keyword in location_keywords])
+            )
+        return [row.id for row in query]
+
+    def count_by_type(self, type_name):
+        return Post.query.filter_by(type=type_name).count()
+
     def create(self, data):
         post = Post(**data)
         db.session.add(post)
@@ -30,6 +68,9 @@ class PostRepository:
     def get_by_user_id(self, user_id):
         return Post.query.filter_by(user_id=user_id).all()
 
+    def page_by_user_id(self, user_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return keyset_paginate(Post.query.filter_by(user_id=user_id), self.PAGE_KEYS, cursor, page_size)
+
     def get_recent_posts(self, limit):
         return Post.query.order_by(Post.post_date.desc()).limit(limit).all()
 
@@ -40,51 +81,111 @@ class PostRepository:
             .all()
         )
 
+    def page_by_type_and_user(self, type_name, user_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return keyset_paginate(
+            Post.query.filter_by(type=type_name, user_id=user_id), self.PAGE_KEYS, cursor, page_size
+        )
+
+    # bm25 column weights: item_name, description, category_name, location
+    FTS_WEIGHTS = (10.0, 1.0, 2.0, 2.0)
+
     def search(self, query, filters=None):
         """
-        Search posts with advanced filtering
+        Search posts with advanced filtering. Keywords go through the post_fts
+        full-text index (prefix matching, BM25 ranking); databases without it
+        fall back to substring matching.
         """
-        search = f"%{query}%"
-        base_query = Post.query.filter(
-            or_(
-                Post.item_name.ilike(search),
-                Post.description.ilike(search),
-                Post.category_name.ilike(search),
-                Post.location.ilike(search),
-            )
-        )
+        def run(match):
+            base_query, keys = self._search_query(match, query, filters)
+            order_by = [column.desc() if descending else column.asc() for column, descending in keys]
+            return base_query.order_by(*order_by).all()
 
-        if filters:
-            if filters.get("type"):
-                base_query = base_query.filter(Post.type == filters["type"])
+        results = self._with_fts_fallback(run, query)
+        print("Results count:", len(results))  # Debug print
+        return results
 
-            if filters.get("category"):
-                base_query = base_query.filter(
-                    Post.category_name == filters["category"]
+    def search_page(self, query, filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        """One keyset page of search results, in the same order as search()"""
+        def run(match):
+            base_query, keys = self._search_query(match, query, filters)
+            return keyset_paginate(base_query, keys, cursor, page_size)
+
+        return self._with_fts_fallback(run, query)
+
+    def _with_fts_fallback(self, run, query):
+        try:
+            return run(self.build_fts_query(query))
+        except OperationalError:
+            db.session.rollback()
+            return run(None)
+
+    @staticmethod
+    def build_fts_query(query):
+        """Turn free text into an FTS5 query: every word required, each as a prefix"""
+        tokens = re.findall(r"\w+", query or "")
+        return " ".join(f'"{token}"*' for token in tokens) or None
+
+    def _search_query(self, match, query, filters):
+        """Build the filtered search query and the keys it is ordered by"""
+        base_query = Post.query
+        keys = list(self.PAGE_KEYS)
+
+        if match:
+            weights = ", ".join(str(weight) for weight in self.FTS_WEIGHTS)
+            fts = (
+                text(f"SELECT rowid AS post_id, bm25(post_fts, {weights}) AS rank "
+                     "FROM post_fts WHERE post_fts MATCH :match")
+                .bindparams(match=match)
+                .columns(post_id=Integer, rank=Float)
+                .subquery("fts")
+            )
+            base_query = base_query.join(fts, fts.c.post_id == Post.id)
+            keys.insert(0, (fts.c.rank, False))
+        elif query:
+            search = f"%{query}%"
+            base_query = base_query.filter(
+                or_(
+                    Post.item_name.ilike(search),
+                    Post.description.ilike(search),
+                    Post.category_name.ilike(search),
+                    Post.location.ilike(search),
                 )
+            )
 
-            if filters.get("location"):
-                location_search = f"%{filters['location']}%"
-                base_query = base_query.filter(Post.location.ilike(location_search))
+        if filters:
+            base_query = self._apply_filters(base_query, filters)
 
-            if filters.get("date_from"):
-                try:
-                    date_from = datetime.strptime(filters["date_from"], "%Y-%m-%d")
-                    base_query = base_query.filter(Post.lOrF_date >= date_from)
-                except ValueError:
-                    pass
+        print("SQL Query:", str(base_query))  # Debug print
+        return base_query, keys
 
-            if filters.get("date_to"):
-                try:
-                    date_to = datetime.strptime(filters["date_to"], "%Y-%m-%d")
-                    base_query = base_query.filter(Post.lOrF_date <= date_to)
-                except ValueError:
-                    pass
+    def _apply_filters(self, base_query, filters):
+        if filters.get("type"):
+            base_query = base_query.filter(Post.type == filters["type"])
 
-        print("SQL Query:", str(base_query))  # Debug print
-        results = base_query.order_by(Post.post_date.desc()).all()
-        print("Results count:", len(results))  # Debug print
-        return results
+        if filters.get("category"):
+            base_query = base_query.filter(
+                Post.category_name == filters["category"]
+            )
+
+        if filters.get("location"):
+            location_search = f"%{filters['location']}%"
+            base_query = base_query.filter(Post.location.ilike(location_search))
+
+        if filters.get("date_from"):
+            try:
+                date_from = datetime.strptime(filters["date_from"], "%Y-%m-%d")
+                base_query = base_query.filter(Post.lOrF_date >= date_from)
+            except ValueError:
+                pass
+
+        if filters.get("date_to"):
+            try:
+                date_to = datetime.strptime(filters["date_to"], "%Y-%m-%d")
+                base_query = base_query.filter(Post.lOrF_date <= date_to)
+            except ValueError:
+                pass
+
+        return base_query
 
     def count_user_posts(self, user_id, type_name=None):
         query = Post.query.filter_by(user_id=user_id)
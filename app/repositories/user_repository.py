@@ -1,7 +1,9 @@
 from app.models.user import User
 from werkzeug.security import generate_password_hash
 from app import db
-from sqlalchemy import func
+from app.models.notification import Notification
+from app.models.chat import Chat
+from sqlalchemy import func, select, or_, case
 
 class UserRepository:
     @staticmethod
@@ -29,6 +31,71 @@ class UserRepository:
         db.session.commit()
         return user
 
+    @staticmethod
+    def _shifted(column, delta):
+        """column + delta, floored at 0; CASE rather than SQLite's scalar max(a, b),
+        which other databases read as the aggregate"""
+        return case((column + delta < 0, 0), else_=column + delta)
+
+    @staticmethod
+    def adjust_unread_counts(user_id, notifications=0, chats=0):
+        """Shift a user's unread counters inside the caller's transaction (no commit)"""
+        values = {}
+        if notifications:
+            values[User.unread_notifications_count] = UserRepository._shifted(
+                User.unread_notifications_count, notifications)
+        if chats:
+            values[User.unread_chats_count] = UserRepository._shifted(User.unread_chats_count, chats)
+        if values:
+            User.query.filter_by(id=user_id).update(values, synchronize_session=False)
+
+    @staticmethod
+    def reset_unread_notifications(user_id):
+        """Zero the unread notification counter (no commit)"""
+        User.query.filter_by(id=user_id).update(
+            {User.unread_notifications_count: 0}, synchronize_session=False)
+
+    @staticmethod
+    def get_unread_counts(user_id):
+        row = (User.query
+               .with_entities(User.unread_notifications_count, User.unread_chats_count)
+               .filter_by(id=user_id)
+               .first())
+        return (row[0], row[1]) if row else (0, 0)
+
+    @staticmethod
+    def get_unread_counts_many(user_ids):
+        """{user_id: (unread notifications, unread chats)} for many users in one query"""
+        if not user_ids:
+            return {}
+        rows = (User.query
+                .with_entities(User.id, User.unread_notifications_count, User.unread_chats_count)
+                .filter(User.id.in_(user_ids))
+                .all())
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    @staticmethod
+    def reconcile_unread_counts():
+        """Recompute both counters from the source tables; returns the ids that drifted"""
+        actual_notifications = (select(func.count(Notification.id))
+                                .where(Notification.user_id == User.id, Notification.is_read == False)
+                                .scalar_subquery())
+        actual_chats = (select(func.count(Chat.id))
+                        .where(Chat.receiver_id == User.id, Chat.is_read == False)
+                        .scalar_subquery())
+        drifted = User.query.filter(or_(
+            User.unread_notifications_count != actual_notifications,
+            User.unread_chats_count != actual_chats,
+        ))
+        drifted_ids = [row.id for row in drifted.with_entities(User.id)]
+        if drifted_ids:
+            User.query.filter(User.id.in_(drifted_ids)).update({
+                User.unread_notifications_count: actual_notifications,
+                User.unread_chats_count: actual_chats,
+            }, synchronize_session=False)
+            db.session.commit()
+        return drifted_ids
+
     def get_top_contributors(self, limit):
         return db.session.query(User)\
         .filter(User.contribution > 0)\
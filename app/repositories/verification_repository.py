@@ -1,13 +1,16 @@
 from app.models.post import Post
 from app.models.verificationClaim import VerificationClaim
-from sqlalchemy import desc
+from sqlalchemy import desc, update
+from datetime import datetime
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from app import db
 
 class VerificationRepository:
     def get_claims_by_post_owner(self, user_id):
-        """Get claims for posts owned by user"""
+        """Get claims for posts owned by user, with post and claimant loaded"""
         return (VerificationClaim.query
                 .join(Post, VerificationClaim.post_id == Post.id)
+                .options(contains_eager(VerificationClaim.post), joinedload(VerificationClaim.user))
                 .filter(Post.user_id == user_id)
                 .order_by(desc(VerificationClaim.submission_date))
                 .all())
@@ -42,20 +45,57 @@ class VerificationRepository:
         return claim
 
     def get_claims_by_post(self, post_id):
-        """Get all claims for a specific post"""
-        return VerificationClaim.query.filter_by(post_id=post_id).all()
+        """Get all claims for a specific post, best scored first, with claimants
+        and proof files loaded"""
+        return (VerificationClaim.query
+                .options(joinedload(VerificationClaim.user), selectinload(VerificationClaim.proof_files))
+                .filter_by(post_id=post_id)
+                .order_by(desc(VerificationClaim.verification_score), VerificationClaim.submission_date)
+                .all())
+
+    def get_unscored(self, limit):
+        """Claims still waiting for a verification score, oldest first, with their posts"""
+        return (VerificationClaim.query
+                .options(joinedload(VerificationClaim.post))
+                .filter(VerificationClaim.scored_at.is_(None))
+                .order_by(VerificationClaim.id)
+                .limit(limit)
+                .all())
+
+    def save_scores(self, scores):
+        """Store {claim_id: score} in one executemany and mark the claims scored"""
+        if not scores:
+            return
+        scored_at = datetime.utcnow()
+        db.session.execute(update(VerificationClaim), [
+            {'id': claim_id, 'verification_score': score, 'scored_at': scored_at}
+            for claim_id, score in scores.items()
+        ])
+        db.session.commit()
+
+    def reset_scores(self, post_id=None):
+        """Queue a post's claims (or every claim) to be scored again"""
+        query = VerificationClaim.query
+        if post_id is not None:
+            query = query.filter_by(post_id=post_id)
+        count = query.update({VerificationClaim.scored_at: None}, synchronize_session=False)
+        db.session.commit()
+        return count
 
     def get_by_id(self, claim_id):
         """Get claim by ID"""
         return VerificationClaim.query.get(claim_id)
 
-    def get_claim_by_status(self, post_id, status, user_id=None):
+    def get_claim_by_status(self, post_id, status, user_id=None, with_user=False):
         """Get claim by post ID and status, optionally filtered by user ID"""
         query = VerificationClaim.query.filter_by(
             post_id=post_id,
             status=status
         )
 
+        if with_user:
+            query = query.options(joinedload(VerificationClaim.user))
+
         if user_id is not None:
             query = query.filter_by(user_id=user_id)
 
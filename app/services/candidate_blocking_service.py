@@ -0,0 +1,76 @@
+import logging
+import threading
+from datetime import timedelta
+from flask import current_app
+from app.repositories.post_repository import PostRepository
+
+
+class CandidateBlockingService:
+    """Cheap SQL pre-filter that decides which posts are worth scoring at all.
+
+    Rules come from the MATCH_BLOCKING config: open posts only, a window
+    around the lost/found date, related category families and optional
+    location groups. Pool sizes before and after blocking are accumulated in
+    process-wide metrics.
+    """
+
+    _metrics = {'queries': 0, 'pool_before': 0, 'pool_after': 0}
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.post_repository = PostRepository()
+
+    @property
+    def config(self):
+        return current_app.config["MATCH_BLOCKING"]
+
+    def candidate_ids(self, post, candidate_type):
+        """IDs of opposite-type posts that survive blocking for this post"""
+        config = self.config
+        date_from = date_to = None
+        if config.get('date_window_days') and post.lOrF_date:
+            window = timedelta(days=config['date_window_days'])
+            date_from, date_to = post.lOrF_date - window, post.lOrF_date + window
+
+        return set(self.post_repository.get_candidate_ids(
+            candidate_type,
+            open_only=config.get('open_only', True),
+            date_from=date_from,
+            date_to=date_to,
+            categories=self.category_family(post.category_name),
+            location_keywords=self.location_group(post.location),
+        ))
+
+    def category_family(self, category_name):
+        """Categories that can match this one; None means no category restriction"""
+        related = set()
+        for family in self.config.get('category_families') or []:
+            if category_name in family:
+                related.update(family)
+        return sorted(related) or None
+
+    def location_group(self, location):
+        """Keywords of the location group this place falls in, if any"""
+        if not location:
+            return None
+        place = location.lower()
+        for keywords in (self.config.get('location_groups') or {}).values():
+            if any(keyword.lower() in place for keyword in keywords):
+                return list(keywords)
+        return None
+
+    def record(self, pool_before, pool_after):
+        with self._lock:
+            self._metrics['queries'] += 1
+            self._metrics['pool_before'] += pool_before
+            self._metrics['pool_after'] += pool_after
+        logging.debug(f"Blocking reduced candidate pool from {pool_before} to {pool_after}")
+
+    @classmethod
+    def metrics(cls):
+        """Totals plus the average fraction of the pool that blocking removed"""
+        with cls._lock:
+            metrics = dict(cls._metrics)
+        metrics['reduction'] = (1 - metrics['pool_after'] / metrics['pool_before']
+                                if metrics['pool_before'] else 0.0)
+        return metrics
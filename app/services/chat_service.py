@@ -1,32 +1,67 @@
+import uuid
+from datetime import datetime
+from flask import current_app
 from app.repositories.chat_repository import ChatRepository
 from app.repositories.verification_repository import VerificationRepository
 from app.repositories.post_repository import PostRepository
+from app.repositories.user_repository import UserRepository
+from app.services.chat_write_buffer import ChatWriteBuffer
+from app.utils.chat_access_cache import chat_access_cache
 
 class ChatService:
     def __init__(self):
         self.chat_repository = ChatRepository()
         self.verification_repository = VerificationRepository()
         self.post_repository = PostRepository()
+        self.write_buffer = ChatWriteBuffer()
 
     def get_post_chats(self, post_id, user_id):
         return self.chat_repository.get_post_chats(post_id, user_id)
 
-    def get_inbox_items(self, user_id):
-        posts = self.chat_repository.get_posts_with_chats(user_id)
-        owned_posts = []
-        other_posts = []
-
-        for post in posts:
-            if post.user_id == user_id:
-                owned_posts.append(post)
-            else:
-                other_posts.append(post)
+    def get_post_chats_page(self, post_id, user_id, cursor=None, page_size=50):
+        """A page of a conversation in display order (oldest first); next_cursor points further back"""
+        page = self.chat_repository.page_post_chats(post_id, user_id, cursor, page_size)
+        page.items.reverse()
+        return page
+
+    def get_post_chats_since(self, post_id, user_id, last_id, limit):
+        return self.chat_repository.get_post_chats_since(post_id, user_id, last_id, limit)
+
+    def get_first_other_sender_id(self, post_id, user_id):
+        return self.chat_repository.get_first_other_sender_id(post_id, user_id)
+
+    def _queue_message(self, post_id, sender_id, receiver_id, message_text):
+        # No id yet: clients match the later message_saved event on client_id
+        row = {
+            'post_id': post_id,
+            'sender_id': sender_id,
+            'receiver_id': receiver_id,
+            'message': message_text,
+            'created_at': datetime.utcnow(),
+            'client_id': uuid.uuid4().hex,
+        }
+        self.write_buffer.queue(row)
+        return {
+            'id': None,
+            'client_id': row['client_id'],
+            'sender_id': sender_id,
+            'message': message_text,
+            'created_at': row['created_at'].strftime('%H:%M')
+        }
 
+    @staticmethod
+    def serialize_message(message):
         return {
-            'owned_posts': owned_posts,
-            'other_posts': other_posts
+            'id': message.id,
+            'client_id': message.client_id,
+            'sender_id': message.sender_id,
+            'message': message.message,
+            'created_at': message.created_at.strftime('%H:%M')
         }
 
+    def get_inbox_page(self, user_id, cursor=None, page_size=20):
+        return self.chat_repository.page_inbox(user_id, cursor, page_size)
+
     def can_access_chat(self, user_id, post_id):
         post = self.post_repository.get_by_id(post_id)
         if not post:
@@ -34,7 +69,7 @@ class ChatService:
 
         # For lost items, anyone can chat
         if post.type == 'lost':
-            return True
+            return UserRepository.get_by_id(user_id) is not None
 
         # Post owner can always chat
         if post.user_id == user_id:
@@ -52,16 +87,55 @@ class ChatService:
 
         return False
 
+    def authorize(self, user_id, post_id):
+        """Check access against the database and remember the decision"""
+        allowed = self.can_access_chat(user_id, post_id)
+        chat_access_cache.set((user_id, post_id), allowed)
+        return allowed
+
+    def can_access_chat_cached(self, user_id, post_id):
+        """The decision made at join time, re-checked only if it expired or was invalidated"""
+        allowed = chat_access_cache.get((user_id, post_id))
+        if allowed is None:
+            allowed = self.authorize(user_id, post_id)
+        return allowed
+
     def get_unread_count(self, user_id):
         return self.chat_repository.get_unread_messages_count(user_id)
 
     def mark_messages_read(self, post_id, user_id):
+        if current_app.config["CHAT_WRITE_BEHIND"]:
+            # Buffered messages must exist before they can be marked read
+            self.write_buffer.flush()
         return self.chat_repository.mark_messages_read(post_id, user_id)
 
+    def clean_message(self, post_id, sender_id, receiver_id, message_text):
+        """(receiver_id, message_text) ready to store, or None if the message cannot be saved.
+
+        Checked before anything is written or queued: a write-behind message is
+        acknowledged before its insert, so the insert must not be what rejects it.
+        """
+        try:
+            receiver_id = int(receiver_id)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(message_text, str) or not message_text.strip():
+            return None
+        if receiver_id == sender_id or not self.can_access_chat_cached(receiver_id, post_id):
+            return None
+        return receiver_id, message_text
+
     def create_message(self, post_id, sender_id, receiver_id, message_text):
         """Create a new chat message if user has access"""
-        if not self.can_access_chat(sender_id, post_id):
+        if not self.can_access_chat_cached(sender_id, post_id):
+            return None
+        cleaned = self.clean_message(post_id, sender_id, receiver_id, message_text)
+        if cleaned is None:
             return None
+        receiver_id, message_text = cleaned
+
+        if current_app.config["CHAT_WRITE_BEHIND"]:
+            return self._queue_message(post_id, sender_id, receiver_id, message_text)
 
         message = self.chat_repository.create_message(
             post_id=post_id,
@@ -70,10 +144,5 @@ class ChatService:
             message_text=message_text
         )
 
-        return {
-            'id': message.id,
-            'sender_id': message.sender_id,
-            'message': message.message,
-            'created_at': message.created_at.strftime('%H:%M')
-        }
+        return self.serialize_message(message)
 
@@ -0,0 +1,142 @@
+import sys
+import atexit
+import signal
+import logging
+import threading
+from sqlalchemy.exc import OperationalError
+from app import app, db, socketio
+from app.repositories.chat_repository import ChatRepository
+
+
+class ChatWriteBuffer:
+    """Write-behind buffer for chat messages (CHAT_WRITE_BEHIND).
+
+    The socket handler queues a message, acknowledges it and broadcasts it
+    straight away, carrying a client_id but no id. A background task inserts
+    everything queued every CHAT_FLUSH_INTERVAL seconds in one transaction,
+    then emits `message_saved` with the ids the database assigned, so an id
+    is never sent before it exists. Whatever is still queued at interpreter
+    exit or on SIGTERM (flush_on_sigterm) is flushed before the process ends.
+
+    ChatService validates messages before queueing them. If a batch is still
+    rejected, its rows are inserted one at a time and those the database
+    refuses are dead-lettered: logged and reported to the room with
+    `message_failed`, so one bad row cannot hold back the rest. Only when the
+    database itself is unavailable is the batch kept for the next flush.
+    """
+
+    COLUMNS = ('post_id', 'sender_id', 'receiver_id', 'message', 'created_at', 'client_id')
+
+    _pending = []
+    _started = False
+    _lock = threading.Lock()
+    # Held for a whole flush so the loop, mark_read and atexit never insert the same rows
+    _flush_lock = threading.Lock()
+
+    def queue(self, row):
+        """Buffer a message row (post_id, sender_id, receiver_id, message, created_at, client_id)"""
+        with self._lock:
+            ChatWriteBuffer._pending.append(row)
+            if ChatWriteBuffer._started:
+                return
+            ChatWriteBuffer._started = True
+        socketio.start_background_task(self._run)
+
+    def _run(self):
+        interval = app.config["CHAT_FLUSH_INTERVAL"]
+        while True:
+            socketio.sleep(interval)
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing chat messages: {e}")
+
+    def flush(self):
+        """Insert queued messages in batches of CHAT_FLUSH_MAX_BATCH; returns how many were saved"""
+        saved = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = ChatWriteBuffer._pending[:app.config["CHAT_FLUSH_MAX_BATCH"]]
+                    del ChatWriteBuffer._pending[:len(batch)]
+                if not batch:
+                    return saved
+                try:
+                    ids = ChatRepository.create_messages([self._columns(row) for row in batch])
+                except OperationalError:
+                    db.session.rollback()
+                    # The database is unavailable, not the rows at fault: put the
+                    # batch back in front so nothing acknowledged is lost or reordered
+                    with self._lock:
+                        ChatWriteBuffer._pending[:0] = batch
+                    raise
+                except Exception as e:
+                    db.session.rollback()
+                    logging.warning(f"Saving {len(batch)} chat messages failed, retrying one by one: {e}")
+                    saved += self._insert_each(batch)
+                    continue
+                saved += len(ids)
+                self._announce(batch, ids)
+
+    def _columns(self, row):
+        return {key: row[key] for key in self.COLUMNS}
+
+    def _insert_each(self, batch):
+        """Insert a rejected batch row by row, dead-lettering the rows that still fail; returns how many were saved"""
+        saved_rows, ids, failed = [], [], []
+        try:
+            for position, row in enumerate(batch):
+                try:
+                    ids.extend(ChatRepository.create_messages([self._columns(row)]))
+                    saved_rows.append(row)
+                except OperationalError:
+                    db.session.rollback()
+                    with self._lock:
+                        ChatWriteBuffer._pending[:0] = batch[position:]
+                    raise
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Dropped chat message that cannot be saved {self._columns(row)!r}: {e}")
+                    failed.append(row)
+        finally:
+            self._announce(saved_rows, ids)
+            self._announce_failed(failed)
+        return len(ids)
+
+    def _announce(self, batch, ids):
+        by_post = {}
+        for row, message_id in zip(batch, ids):
+            by_post.setdefault(row['post_id'], []).append(
+                {'client_id': row['client_id'], 'id': message_id})
+        for post_id, saved in by_post.items():
+            socketio.emit('message_saved', {'post_id': post_id, 'messages': saved},
+                          room=f'post_{post_id}')
+
+    def _announce_failed(self, rows):
+        by_post = {}
+        for row in rows:
+            by_post.setdefault(row['post_id'], []).append(row['client_id'])
+        for post_id, client_ids in by_post.items():
+            socketio.emit('message_failed', {'post_id': post_id, 'client_ids': client_ids},
+                          room=f'post_{post_id}')
+
+
+@atexit.register
+def _flush_on_exit():
+    if ChatWriteBuffer._pending:
+        with app.app_context():
+            saved = ChatWriteBuffer().flush()
+        logging.info(f"Flushed {saved} buffered chat messages at shutdown")
+
+
+def flush_on_sigterm():
+    """Make SIGTERM exit through SystemExit so atexit flushes the buffer.
+
+    Only when nothing else handles SIGTERM yet: a server that installs its own
+    handler (gunicorn's workers, which also end in SystemExit) is left alone.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
@@ -0,0 +1,105 @@
+import re
+import logging
+import numpy as np
+from app.repositories.verification_repository import VerificationRepository
+from app.services.matching_service import MatchingService
+
+WORD = re.compile(r"\w+")
+
+
+class ClaimScoringService:
+    """Scores verification claims against the post they claim, in batches.
+
+    A claim's score (0-1) blends how close its identifier and proof text are
+    to the post's embedding, how well the places agree and whether the item
+    was lost shortly before it was found. Components a claim or post has no
+    data for are left out and the remaining weights rescaled.
+    """
+
+    TEXT_WEIGHT = 0.6
+    LOCATION_WEIGHT = 0.2
+    DATE_WEIGHT = 0.2
+    # A loss this many days before the find scores 0 on date
+    DATE_WINDOW_DAYS = 30
+
+    def __init__(self):
+        self.verification_repository = VerificationRepository()
+        self.matching_service = MatchingService()
+
+    def score_pending(self, limit):
+        """Score up to `limit` unscored claims; returns how many were scored"""
+        if not self.matching_service.model:
+            # Leave them queued rather than store scores without the text signal
+            return 0
+        claims = self.verification_repository.get_unscored(limit)
+        if not claims:
+            return 0
+        self.verification_repository.save_scores(self.score_claims(claims))
+        logging.info(f"Scored {len(claims)} verification claims")
+        return len(claims)
+
+    def score_claims(self, claims):
+        """Return {claim_id: score}; one model call for the whole batch"""
+        # Claims on deleted posts score 0 so they leave the queue
+        scores = {claim.id: 0.0 for claim in claims if claim.post is None}
+        claims = [claim for claim in claims if claim.post is not None]
+        if not claims:
+            return scores
+
+        post_vectors = self.matching_service.get_post_embeddings(list({claim.post for claim in claims}))
+        # A claim with no identifier or proof text has no text component at all;
+        # encoding "" would still yield a vector and a meaningless similarity
+        texts = {claim.id: self.claim_text(claim) for claim in claims}
+        with_text = [claim.id for claim in claims if texts[claim.id]]
+        encoded = self.matching_service.encode_texts([texts[claim_id] for claim_id in with_text])
+        claim_vectors = dict(zip(with_text, encoded)) if encoded is not None else {}
+
+        for claim in claims:
+            post_vector = post_vectors.get(claim.post_id)
+            claim_vector = claim_vectors.get(claim.id)
+            text = None
+            if claim_vector is not None and post_vector is not None:
+                text = self.cosine(claim_vector, post_vector)
+            components = [
+                (self.TEXT_WEIGHT, text),
+                (self.LOCATION_WEIGHT, self.location_agreement(claim.lost_location, claim.post.location)),
+                (self.DATE_WEIGHT, self.date_agreement(claim.lost_date, claim.post.lOrF_date, claim.post.type)),
+            ]
+            weighted = [(weight, value) for weight, value in components if value is not None]
+            total = sum(weight for weight, _ in weighted)
+            scores[claim.id] = sum(weight * value for weight, value in weighted) / total if total else 0.0
+        return scores
+
+    @staticmethod
+    def claim_text(claim):
+        return f"{claim.unique_identifier or ''} {claim.additional_proof or ''}".strip()
+
+    @staticmethod
+    def cosine(a, b):
+        norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+        return max(float(np.dot(a, b)) / norm, 0.0) if norm else 0.0
+
+    @staticmethod
+    def location_agreement(claimed, actual):
+        """Word overlap of the two places (Jaccard), 1.0 for the same place"""
+        claimed_words = set(WORD.findall((claimed or "").lower()))
+        actual_words = set(WORD.findall((actual or "").lower()))
+        if not claimed_words or not actual_words:
+            return None
+        return len(claimed_words & actual_words) / len(claimed_words | actual_words)
+
+    @classmethod
+    def date_agreement(cls, lost_date, post_date, post_type):
+        """1.0 for the same day, falling to 0 over DATE_WINDOW_DAYS.
+
+        For a found post the item cannot have been lost after it was found;
+        a day of slack covers time zones.
+        """
+        if not lost_date or not post_date:
+            return None
+        days = (post_date.date() - lost_date).days
+        if post_type != 'found':
+            days = abs(days)
+        elif days < -1:
+            return 0.0
+        return max(1.0 - max(days, 0) / cls.DATE_WINDOW_DAYS, 0.0)
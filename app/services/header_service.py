@@ -0,0 +1,37 @@
+from flask import current_app
+from app.repositories.notification_repository import NotificationRepository
+from app.utils.header_cache import header_cache
+
+
+class HeaderService:
+    """Navbar data shown on every page: recent notifications and unread badges"""
+
+    def __init__(self):
+        self.notification_repository = NotificationRepository()
+
+    def get_header_data(self, user_id):
+        data = header_cache.get(user_id)
+        if data is None:
+            data = self._load(user_id)
+            header_cache.set(user_id, data)
+        return data
+
+    def _load(self, user_id):
+        limit = current_app.config["NAV_NOTIFICATIONS_LIMIT"]
+        notifications_count, unread_chats = self.notification_repository.get_unread_counts(user_id)
+        # Plain dicts, not ORM rows, so cached entries outlive the request session
+        notifications = [
+            {
+                'id': notification.id,
+                'message': notification.message,
+                'link': notification.link,
+                'is_read': notification.is_read,
+                'created_at': notification.created_at,
+            }
+            for notification in self.notification_repository.get_recent(user_id, limit)
+        ]
+        return {
+            'notifications': notifications,
+            'notifications_count': notifications_count,
+            'unread_chats': unread_chats,
+        }
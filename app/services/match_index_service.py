@@ -0,0 +1,107 @@
+import os
+import atexit
+import logging
+import threading
+from flask import current_app
+from app.utils.vector_index import VectorIndex
+
+
+class MatchIndexService:
+    """Process-wide ANN indexes over post embeddings, one per post type.
+
+    Indexes are loaded lazily from MATCH_INDEX_FOLDER and written back every
+    SAVE_EVERY changes and at interpreter exit. The post_embedding table stays
+    the source of truth; MatchingService syncs an index against it before
+    every search, since other processes edit and delete posts too.
+    """
+
+    SAVE_EVERY = 50
+
+    _indexes = {}
+    _paths = {}
+    _pending_changes = {}
+    _lock = threading.RLock()
+
+    def is_loaded(self, post_type):
+        return post_type in self._indexes
+
+    def load(self, post_type, dimensions):
+        """Return the index for a post type, reading it from disk the first time"""
+        with self._lock:
+            if post_type in self._indexes:
+                return self._indexes[post_type]
+
+            folder = current_app.config["MATCH_INDEX_FOLDER"]
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{post_type}.npz")
+
+            index = None
+            if os.path.exists(path):
+                try:
+                    index = VectorIndex.load(path)
+                    if index.dimensions != dimensions:
+                        logging.info(f"Discarding {post_type} index built for {index.dimensions} dimensions")
+                        index = None
+                except Exception as e:
+                    logging.error(f"Error loading {post_type} match index: {e}")
+            if index is None:
+                index = VectorIndex(dimensions)
+
+            self._indexes[post_type] = index
+            self._paths[post_type] = path
+            self._pending_changes[post_type] = 0
+            return index
+
+    def add(self, post_type, post_ids, vectors):
+        """Insert or replace vectors in a loaded index; unloaded ones catch up on load"""
+        with self._lock:
+            index = self._indexes.get(post_type)
+            if index is None or not len(post_ids):
+                return
+            index.add_many(post_ids, vectors)
+            self._record_changes(post_type, len(post_ids))
+
+    def remove(self, post_type, post_id):
+        with self._lock:
+            index = self._indexes.get(post_type)
+            if index is not None and index.remove(post_id):
+                self._record_changes(post_type, 1)
+
+    def synced_at(self, post_type):
+        """updated_at of the newest embedding the index has taken in, or None"""
+        index = self._indexes.get(post_type)
+        return index.synced_at if index is not None else None
+
+    def mark_synced(self, post_type, synced_at):
+        with self._lock:
+            index = self._indexes.get(post_type)
+            if index is not None and synced_at != index.synced_at:
+                index.synced_at = synced_at
+                self._record_changes(post_type, 1)
+
+    def search(self, post_type, vector, k, allowed_ids=None):
+        with self._lock:
+            index = self._indexes.get(post_type)
+            if index is None:
+                return []
+            return index.search(vector, k, allowed_ids)
+
+    def save(self, post_type=None):
+        with self._lock:
+            post_types = [post_type] if post_type else list(self._indexes)
+            for name in post_types:
+                if not self._pending_changes.get(name):
+                    continue
+                try:
+                    self._indexes[name].save(self._paths[name])
+                    self._pending_changes[name] = 0
+                except Exception as e:
+                    logging.error(f"Error saving {name} match index: {e}")
+
+    def _record_changes(self, post_type, count):
+        self._pending_changes[post_type] += count
+        if self._pending_changes[post_type] >= self.SAVE_EVERY:
+            self.save(post_type)
+
+
+atexit.register(MatchIndexService().save)
@@ -0,0 +1,114 @@
+import time
+import uuid
+import logging
+from app import db
+from app.repositories.match_job_repository import MatchJobRepository
+from app.repositories.post_repository import PostRepository
+from app.services.post_service import PostService
+from app.services.claim_scoring_service import ClaimScoringService
+from app.services.candidate_blocking_service import CandidateBlockingService
+from app.services.notification_push_service import NotificationPushService
+
+
+class MatchWorkerService:
+    """Drains the match_job queue: embeds queued posts, scores them and notifies owners.
+
+    Between batches it also scores new verification claims, so both kinds of
+    inference stay off the request path and share one loaded model.
+
+    Runs as its own process through `flask match-worker` (the default), or,
+    for development, as a background task of `python run.py` (start_match_worker).
+    """
+
+    # Jobs claimed longer ago than this belong to a worker that died mid-batch
+    STALE_AFTER_SECONDS = 600
+
+    def __init__(self, batch_size=16):
+        self.batch_size = batch_size
+        self.worker_id = str(uuid.uuid4())
+        self.job_repository = MatchJobRepository()
+        self.post_repository = PostRepository()
+        self.post_service = PostService()
+        self.claim_scoring_service = ClaimScoringService()
+
+    def run_once(self):
+        """Process one batch; returns the number of jobs claimed"""
+        jobs = self.job_repository.claim_batch(self.worker_id, self.batch_size)
+        if not jobs:
+            return 0
+
+        try:
+            # Posts deleted while queued simply drop out here
+            posts = self.post_repository.get_by_ids({job.post_id for job in jobs})
+            self.post_service.process_matches_batch(posts)
+            self.job_repository.complete(jobs)
+            metrics = CandidateBlockingService.metrics()
+            logging.info(f"Matched {len(posts)} queued posts "
+                         f"(blocking removed {metrics['reduction']:.0%} of candidates so far)")
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error processing match jobs: {e}")
+            for job in jobs:
+                self.job_repository.fail(job, e)
+        # Outside a Socket.IO server nothing else would send the batch's pushes
+        NotificationPushService().flush_pending()
+        return len(jobs)
+
+    def score_claims_once(self):
+        """Score one batch of new verification claims; returns how many were scored"""
+        try:
+            return self.claim_scoring_service.score_pending(self.batch_size)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error scoring verification claims: {e}")
+            return 0
+
+    def run_forever(self, poll_interval=1.0, sleep=time.sleep):
+        released = self.job_repository.release_stale(self.STALE_AFTER_SECONDS)
+        if released:
+            logging.info(f"Requeued {released} stale match jobs")
+
+        while True:
+            try:
+                processed = self.run_once() + self.score_claims_once()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Match worker error: {e}")
+                processed = 0
+            if not processed:
+                sleep(poll_interval)
+
+
+def start_match_worker(app, socketio):
+    """Run the match worker as a background task of the web server"""
+    app.extensions["match_worker_started"] = True
+
+    def run():
+        with app.app_context():
+            MatchWorkerService(app.config["MATCH_WORKER_BATCH_SIZE"]).run_forever(
+                app.config["MATCH_WORKER_POLL_INTERVAL"], sleep=socketio.sleep)
+
+    return socketio.start_background_task(run)
+
+
+def warn_if_queue_unattended(app):
+    """Log a warning on the first request if match jobs are waiting and this
+    process runs no worker, so a missing `flask match-worker` gets noticed"""
+    checked = []
+
+    @app.before_request
+    def check_match_queue():
+        if checked:
+            return
+        checked.append(True)
+        if app.extensions.get("match_worker_started"):
+            return
+        try:
+            pending = MatchJobRepository().count_by_status().get('pending', 0)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error checking the match queue: {e}")
+            return
+        if pending:
+            logging.warning(f"{pending} match jobs are pending and this process runs no match worker; "
+                            f"start `flask match-worker` (MATCH_WORKER_MODE={app.config['MATCH_WORKER_MODE']})")
@@ -1,86 +1,300 @@
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from app.models.post import Post
+import hashlib
 from app.models.notification import Notification
+from app.repositories.embedding_repository import EmbeddingRepository
+from app.repositories.post_repository import PostRepository
+from app.repositories.notification_repository import NotificationRepository
+from app.services.match_index_service import MatchIndexService
+from app.services.candidate_blocking_service import CandidateBlockingService
+from app.services.model_registry import ModelRegistry
 from app import db
+from sqlalchemy import tuple_
 import logging
 
+MODEL_NAME = 'paraphrase-MiniLM-L6-v2'
+
 class MatchingService:
+    MATCH_NOTIFICATION_TITLE = "Potential Match Found!"
+
     def __init__(self):
+        self.embedding_repository = EmbeddingRepository()
+        self.post_repository = PostRepository()
+        self.notification_repository = NotificationRepository()
+        self.index_service = MatchIndexService()
+        self.blocking_service = CandidateBlockingService()
+
+    @property
+    def model(self):
+        """Shared model instance; loaded on first use, None if unavailable"""
+        return ModelRegistry.get(MODEL_NAME)
+
+    @staticmethod
+    def build_post_text(post):
+        """Text used to embed a post; combines item properties for more context"""
+        return (f"{post.item_name} {post.description} "
+                f"{post.category_name} {post.location}")
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def encode_texts(self, texts):
+        """Encode a list of texts in a single model call"""
+        if not texts or not self.model:
+            return None
+
         try:
-            self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-            logging.info("Matching service initialized successfully")
+            embeddings = self.model.encode(texts, show_progress_bar=False)
+            return np.asarray(embeddings, dtype=np.float32)
         except Exception as e:
-            logging.error(f"Error initializing matching service: {e}")
-            self.model = None
-            
+            logging.error(f"Error encoding texts: {e}")
+            return None
+
     def compute_text_similarity(self, text1, text2):
         if not text1 or not text2 or not self.model:
             return 0
-        
+
+        embeddings = self.encode_texts([text1, text2])
+        if embeddings is None:
+            return 0
+        return self.compute_vector_similarity(embeddings[0], embeddings[1])
+
+    def compute_vector_similarity(self, vector1, vector2):
         try:
-            # Add more context by combining item properties
-            embedding1 = self.model.encode([text1], show_progress_bar=False)[0]
-            embedding2 = self.model.encode([text2], show_progress_bar=False)[0]
-            similarity = float(cosine_similarity([embedding1], [embedding2])[0][0])
+            similarity = float(cosine_similarity([vector1], [vector2])[0][0])
             logging.debug(f"Similarity score: {similarity}")
             return similarity
         except Exception as e:
             logging.error(f"Error computing similarity: {e}")
             return 0
-            
-    def find_matches(self, post, threshold=0.5):  # Lower threshold for better matches
+
+    def embedding_is_current(self, post):
+        """Whether the stored vector was built from the post's current text"""
+        embedding = self.embedding_repository.get_by_post_id(post.id)
+        return bool(embedding and embedding.model_name == MODEL_NAME
+                    and embedding.text_hash == self.hash_text(self.build_post_text(post)))
+
+    def update_post_embedding(self, post):
+        """Encode a post once and persist its vector.
+
+        Skips the model entirely when the stored vector was built from the
+        same text with the same model, so unrelated edits stay cheap.
+        """
+        return self.get_post_embeddings([post]).get(post.id)
+
+    def get_post_embeddings(self, posts):
+        """Return {post_id: vector}, encoding only posts with a missing or stale vector"""
+        if not posts:
+            return {}
+
+        stored = self.embedding_repository.get_by_post_ids([p.id for p in posts])
+        vectors = {}
+        stale = []
+
+        for post in posts:
+            text = self.build_post_text(post)
+            text_hash = self.hash_text(text)
+            embedding = stored.get(post.id)
+            if (embedding and embedding.model_name == MODEL_NAME
+                    and embedding.text_hash == text_hash):
+                vectors[post.id] = embedding.to_vector()
+            else:
+                stale.append((post, text, text_hash, embedding))
+
+        if stale:
+            encoded = self.encode_texts([text for _, text, _, _ in stale])
+            if encoded is None:
+                return vectors
+
+            for (post, _, text_hash, embedding), vector in zip(stale, encoded):
+                if embedding:
+                    self.embedding_repository.update(
+                        embedding, MODEL_NAME, text_hash, vector, commit=False)
+                else:
+                    self.embedding_repository.create(
+                        post.id, MODEL_NAME, text_hash, vector, commit=False)
+                vectors[post.id] = vector
+
+            self.embedding_repository.save_all()
+            logging.info(f"Stored embeddings for {len(stale)} posts")
+
+            for post_type in {post.type for post, _, _, _ in stale}:
+                encoded_ids = [post.id for post, _, _, _ in stale if post.type == post_type]
+                self.index_service.add(post_type, encoded_ids, [vectors[i] for i in encoded_ids])
+
+        return vectors
+
+    CATEGORY_BONUS = 0.2
+    # Blocked pools up to this size are scored exactly; larger ones are cut to
+    # their ANN_CANDIDATES nearest neighbours, searched within the blocked pool
+    EXACT_POOL_LIMIT = 500
+    ANN_CANDIDATES = 100
+    RECONCILE_CHUNK = 500
+
+    def remove_post(self, post_type, post_id):
+        """Drop a deleted post from this process's match index; others catch up in ensure_index"""
+        self.index_service.remove(post_type, post_id)
+
+    def ensure_index(self, post_type):
+        """Load the ANN index for a post type and bring it in line with the database.
+
+        Runs before every ANN search, not just on load: the web app and the
+        match worker each hold their own copy, so posts deleted elsewhere are
+        dropped and vectors re-encoded since the index last synced are reloaded.
+        """
+        if not self.model:
+            return False
+
+        index = self.index_service.load(post_type, self.model.get_sentence_embedding_dimension())
+        post_ids = set(self.post_repository.get_ids_by_type(post_type))
+
+        for post_id in index.ids() - post_ids:
+            self.index_service.remove(post_type, post_id)
+
+        changed = self.embedding_repository.get_changed_since(
+            post_type, MODEL_NAME, self.index_service.synced_at(post_type))
+        if changed:
+            self.index_service.add(post_type, [e.post_id for e in changed], [e.to_vector() for e in changed])
+            self.index_service.mark_synced(post_type, changed[-1].updated_at)
+
+        missing_ids = sorted(post_ids - index.ids())
+        for start in range(0, len(missing_ids), self.RECONCILE_CHUNK):
+            posts = self.post_repository.get_by_ids(missing_ids[start:start + self.RECONCILE_CHUNK])
+            vectors = self.get_post_embeddings(posts)
+            pending = [post_id for post_id in vectors if post_id not in index]
+            self.index_service.add(post_type, pending, [vectors[i] for i in pending])
+
+        if missing_ids:
+            logging.info(f"Added {len(missing_ids)} posts to the {post_type} match index")
+        self.index_service.save(post_type)
+        return True
+
+    def find_matches(self, post, threshold=0.5, top_k=None):  # Lower threshold for better matches
         try:
-            matches = []
-            opposite_type = "found" if post.type == "lost" else "lost"
-            potential_matches = Post.query.filter_by(type=opposite_type).all()
-            
-            for candidate in potential_matches:
-                if candidate.id == post.id:
-                    continue
-                    
-                post_text = (f"{post.item_name} {post.description} "
-                           f"{post.category_name} {post.location}")
-                candidate_text = (f"{candidate.item_name} {candidate.description} "
-                                f"{candidate.category_name} {candidate.location}")
-                
-                # Calculate similarity score
-                score = self.compute_text_similarity(post_text, candidate_text)
-                
-                # Add category bonus
-                if post.category_name == candidate.category_name:
-                    score += 0.2
-                
-                if score >= threshold:
-                    matches.append({'post': candidate, 'score': min(score, 1.0)})
-                    logging.info(f"Found match: {candidate.item_name} with score {score}")
-            
-            return sorted(matches, key=lambda x: x['score'], reverse=True)
+            return self.find_matches_batch([post], threshold, top_k).get(post.id, [])
         except Exception as e:
             logging.error(f"Error finding matches: {e}")
             return []
-        
+
+    def find_matches_batch(self, posts, threshold=0.5, top_k=None):
+        """Score many new posts against the opposite-type pool.
+
+        Each query's pool is first narrowed in SQL by CandidateBlockingService.
+        Small pools are scored in full; large ones are cut to the query's
+        nearest blocked neighbours in the opposite-type ANN index. All candidates of a
+        type group are then scored together with one cosine similarity pass.
+        Returns {post_id: matches}, sorted by score like find_matches.
+        """
+        results = {post.id: [] for post in posts}
+        for post_type in ("lost", "found"):
+            queries = [post for post in posts if post.type == post_type]
+            if not queries:
+                continue
+
+            opposite_type = "found" if post_type == "lost" else "lost"
+            query_vectors = self.get_post_embeddings(queries)
+            pool_size = self.post_repository.count_by_type(opposite_type)
+
+            allowed = {}
+            index_ready = None
+            for post in queries:
+                vector = query_vectors.get(post.id)
+                if vector is None:
+                    continue
+
+                blocked_ids = self.blocking_service.candidate_ids(post, opposite_type)
+                self.blocking_service.record(pool_size, len(blocked_ids))
+                if len(blocked_ids) > self.EXACT_POOL_LIMIT and index_ready is None:
+                    # One sync per batch; hits are also limited to the live blocked ids
+                    index_ready = self.ensure_index(opposite_type)
+                if len(blocked_ids) > self.EXACT_POOL_LIMIT and index_ready:
+                    neighbours = self.index_service.search(
+                        opposite_type, vector, self.ANN_CANDIDATES, blocked_ids)
+                    blocked_ids = {candidate_id for candidate_id, _ in neighbours}
+                allowed[post.id] = blocked_ids
+
+            candidates = self.post_repository.get_by_ids(set().union(*allowed.values()))
+            results.update(self._score_against_pool(
+                queries, query_vectors, candidates, allowed, threshold, top_k))
+        return results
+
+    def _score_against_pool(self, queries, query_vectors, candidates, allowed, threshold, top_k):
+        candidate_vectors = self.get_post_embeddings(candidates)
+        queries = [post for post in queries if post.id in query_vectors]
+        candidates = [post for post in candidates if post.id in candidate_vectors]
+        if not queries or not candidates:
+            return {}
+
+        query_matrix = np.ascontiguousarray(
+            np.vstack([query_vectors[post.id] for post in queries]))
+        candidate_matrix = np.ascontiguousarray(
+            np.vstack([candidate_vectors[post.id] for post in candidates]))
+
+        # Calculate similarity scores, then add the category bonus
+        scores = cosine_similarity(query_matrix, candidate_matrix)
+        query_categories = np.array([post.category_name for post in queries], dtype=object)
+        candidate_categories = np.array([post.category_name for post in candidates], dtype=object)
+        scores += self.CATEGORY_BONUS * (query_categories[:, None] == candidate_categories[None, :])
+
+        # Each query only keeps the candidates that survived its own blocking,
+        # and a post never matches itself
+        positions = {post.id: i for i, post in enumerate(candidates)}
+        permitted = np.zeros(scores.shape, dtype=bool)
+        for row, post in enumerate(queries):
+            columns = [positions[i] for i in allowed.get(post.id, ()) if i in positions and i != post.id]
+            permitted[row, columns] = True
+        scores[~permitted] = -np.inf
+
+        results = {}
+        for row, post in enumerate(queries):
+            row_scores = scores[row]
+            selected = np.flatnonzero(row_scores >= threshold)
+            if top_k is not None and len(selected) > top_k:
+                selected = selected[np.argpartition(-row_scores[selected], top_k - 1)[:top_k]]
+            selected = selected[np.argsort(-row_scores[selected], kind="stable")]
+
+            results[post.id] = [
+                {'post': candidates[i], 'score': min(float(row_scores[i]), 1.0)}
+                for i in selected
+            ]
+            logging.info(f"Found {len(selected)} matches for post {post.id}")
+        return results
+
     def create_match_notification(self, user_id, match_post, original_post, score):
+        self.create_match_notifications([(user_id, match_post, original_post, score)])
+
+    def create_match_notifications(self, matches):
+        """Notify users of (user_id, match_post, original_post, score) matches.
+
+        Skips users already notified about the same post, checked with one
+        query for the whole batch, and inserts the rest in one statement.
+        Errors are rolled back and re-raised so a queued job is retried.
+        """
         try:
-            # Check if notification already exists
-            existing = Notification.query.filter_by(
-                user_id=user_id,
-                link=f"/posts/post/{match_post.id}"
-            ).first()
-            
-            if not existing:
-                notification = Notification(
-                    user_id=user_id,
-                    title="Potential Match Found!",
-                    message=f"We found a {score:.0%} match for your {original_post.type} item '{original_post.item_name}'",
-                    link=f"/posts/post/{match_post.id}",
-                    is_read=False
-                )
-                db.session.add(notification)
-                db.session.commit()
-                logging.info(f"Created notification for user {user_id}")
-                
+            rows = {}
+            for user_id, match_post, original_post, score in matches:
+                link = f"/posts/post/{match_post.id}"
+                rows.setdefault((user_id, link), {
+                    'user_id': user_id,
+                    'title': self.MATCH_NOTIFICATION_TITLE,
+                    'message': f"We found a {score:.0%} match for your {original_post.type} item '{original_post.item_name}'",
+                    'link': link,
+                    'is_read': False
+                })
+            if not rows:
+                return
+
+            existing = db.session.query(Notification.user_id, Notification.link).filter(
+                tuple_(Notification.user_id, Notification.link).in_(list(rows))
+            ).all()
+            for key in existing:
+                rows.pop(tuple(key), None)
+
+            created = self.notification_repository.create_many(list(rows.values()))
+            logging.info(f"Created {created} match notifications")
+
         except Exception as e:
             logging.error(f"Error creating notification: {e}")
             db.session.rollback()
+            raise
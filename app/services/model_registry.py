@@ -0,0 +1,64 @@
+import gc
+import logging
+import threading
+from sentence_transformers import SentenceTransformer
+
+
+class ModelRegistry:
+    """Process-wide cache of SentenceTransformer models.
+
+    Every service asks the registry for a model by name, so a worker holds one
+    copy of each model no matter how many services are built. Call preload()
+    in a pre-fork master (e.g. gunicorn --preload with PRELOAD_MODELS=1) and the
+    forked workers share the weights copy-on-write.
+    """
+
+    _models = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name):
+        """Return the named model, loading it on first use; None if it cannot load"""
+        if name in cls._models:
+            return cls._models[name]
+
+        with cls._lock:
+            if name not in cls._models:
+                try:
+                    model = SentenceTransformer(name)
+                    model.eval()
+                    logging.info(f"Loaded model {name} ({cls.model_bytes(model) / 2**20:.1f} MB)")
+                except Exception as e:
+                    # Remember the failure so callers degrade instead of retrying per request
+                    logging.error(f"Error loading model {name}: {e}")
+                    model = None
+                cls._models[name] = model
+            return cls._models[name]
+
+    @classmethod
+    def preload(cls, *names):
+        for name in names:
+            cls.get(name)
+        # Move everything loaded so far out of the collector's reach, so GC passes
+        # in the workers do not write to (and un-share) the preloaded pages
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+    @classmethod
+    def is_loaded(cls, name):
+        return cls._models.get(name) is not None
+
+    @staticmethod
+    def model_bytes(model):
+        """Bytes held by a model's parameters and buffers"""
+        try:
+            tensors = list(model.parameters()) + list(model.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            return 0
+
+    @classmethod
+    def memory_usage(cls):
+        """Report {model_name: bytes} for every loaded model"""
+        return {name: cls.model_bytes(model)
+                for name, model in cls._models.items() if model is not None}
@@ -0,0 +1,100 @@
+import logging
+import threading
+from app import app, socketio
+from app.repositories.user_repository import UserRepository
+
+
+def user_room(user_id):
+    return f"user_{user_id}"
+
+
+class NotificationPushService:
+    """Pushes new notifications and badge counts to each user's Socket.IO room.
+
+    Notifications queued within COALESCE_SECONDS of each other are sent as one
+    `notifications` event per user holding at most MAX_ITEMS of the newest
+    ones, so a match batch that notifies a user many times costs one emit.
+    Emits are spread over EMIT_CHUNK users per yield so a large fan-out does
+    not starve the server's other green threads.
+
+    In a Socket.IO server the flush runs as a background task. A process with
+    no server (`flask match-worker`, see configure_for_worker) never schedules
+    those tasks; it flushes after each batch with flush_pending instead, and
+    its emits reach browsers only through SOCKETIO_MESSAGE_QUEUE.
+    """
+
+    DEFERRED, IMMEDIATE, OFF = 'deferred', 'immediate', 'off'
+
+    _mode = DEFERRED
+    _pending = {}
+    _scheduled = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure_for_worker(cls):
+        """Push from a process that runs no Socket.IO server"""
+        if app.config["SOCKETIO_MESSAGE_QUEUE"]:
+            cls._mode = cls.IMMEDIATE
+        else:
+            cls._mode = cls.OFF
+            logging.warning("SOCKETIO_MESSAGE_QUEUE is not set, so notifications created by this "
+                            "worker cannot be pushed; browsers poll for them instead")
+
+    def queue(self, notifications):
+        """Buffer committed notifications (dicts with user_id) for the next flush"""
+        if not notifications or NotificationPushService._mode == self.OFF:
+            return
+        max_items = app.config["NOTIFICATION_PUSH_MAX_ITEMS"]
+        with self._lock:
+            for notification in notifications:
+                entry = NotificationPushService._pending.setdefault(
+                    notification['user_id'], {'items': [], 'dropped': 0})
+                entry['items'].append(notification)
+                if len(entry['items']) > max_items:
+                    entry['items'].pop(0)
+                    entry['dropped'] += 1
+            if NotificationPushService._mode != self.DEFERRED or NotificationPushService._scheduled:
+                return
+            NotificationPushService._scheduled = True
+        socketio.start_background_task(self._flush_later)
+
+    def _flush_later(self):
+        socketio.sleep(app.config["NOTIFICATION_PUSH_COALESCE_SECONDS"])
+        with self._lock:
+            NotificationPushService._scheduled = False
+        self.flush_pending()
+
+    def flush_pending(self):
+        """Emit everything buffered so far; returns how many users were pushed to"""
+        with self._lock:
+            pending = NotificationPushService._pending
+            NotificationPushService._pending = {}
+        if not pending:
+            return 0
+        try:
+            with app.app_context():
+                self.flush(pending)
+        except Exception as e:
+            logging.error(f"Error pushing notifications: {e}")
+        return len(pending)
+
+    @staticmethod
+    def pushes_reach_browsers():
+        """False when match notifications come from an external worker with no
+        message queue to carry its emits, so pages have to poll for them"""
+        return app.config["MATCH_WORKER_MODE"] != "external" or bool(app.config["SOCKETIO_MESSAGE_QUEUE"])
+
+    def flush(self, pending):
+        """Emit one event per user in `pending` ({user_id: {'items', 'dropped'}})"""
+        counts = UserRepository.get_unread_counts_many(list(pending))
+        chunk = app.config["NOTIFICATION_PUSH_EMIT_CHUNK"]
+        for i, (user_id, entry) in enumerate(pending.items(), start=1):
+            notifications_count, unread_chats = counts.get(user_id, (0, 0))
+            socketio.emit('notifications', {
+                'notifications': entry['items'][::-1],
+                'dropped': entry['dropped'],
+                'notifications_count': notifications_count,
+                'unread_chats': unread_chats,
+            }, room=user_room(user_id))
+            if i % chunk == 0:
+                socketio.sleep(0)
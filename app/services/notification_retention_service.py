@@ -0,0 +1,47 @@
+import time
+import logging
+from datetime import datetime, timedelta
+from app.repositories.notification_repository import NotificationRepository
+from app.services.matching_service import MatchingService
+
+
+class NotificationRetentionService:
+    """Keeps the notification table small: collapses repeated match
+    notifications and archives read ones past the retention window.
+
+    Work is done in batches, each its own short transaction, with a pause in
+    between so SQLite's single write lock is never held for long and web
+    requests can write between batches.
+    """
+
+    def __init__(self, batch_size=500, pause=0.05):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.notification_repository = NotificationRepository()
+
+    def run(self, retention_days):
+        """Run both passes; returns {'collapsed': n, 'expired': n}"""
+        collapsed = self._drain(lambda: self.notification_repository.get_superseded_ids(
+            MatchingService.MATCH_NOTIFICATION_TITLE, self.batch_size), 'collapsed')
+
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        expired = self._drain(lambda: self.notification_repository.get_expired_ids(
+            cutoff, self.batch_size), 'expired')
+
+        logging.info(f"Notification retention: collapsed {collapsed}, archived {expired}")
+        return {'collapsed': collapsed, 'expired': expired}
+
+    def _drain(self, next_ids, reason):
+        total = 0
+        while True:
+            ids = next_ids()
+            if not ids:
+                return total
+            moved = self.notification_repository.archive(ids, reason)
+            if not moved:
+                # The batch failed and was rolled back; stop rather than spin on it
+                return total
+            total += moved
+            if len(ids) < self.batch_size:
+                return total
+            time.sleep(self.pause)
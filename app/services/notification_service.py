@@ -33,9 +33,9 @@ class NotificationService:
             print(f"Error clearing notifications: {e}")
             return False
 
-    def get_user_notifications(self, user_id, limit=None):
-        """Get all notifications for a user"""
-        return self.notification_repository.get_user_notifications(user_id, limit)
+    def get_notifications_page(self, user_id, cursor=None, page_size=50):
+        """One page of a user's notifications, newest first"""
+        return self.notification_repository.page_user_notifications(user_id, cursor, page_size)
 
     def create_verification_notification(self, user_id, message, link):
         """Create a new verification-related notification"""
@@ -59,23 +59,24 @@ class NotificationService:
     def create_chat_enabled_notifications(self, claimer_id, owner_id, post_id, item_name):
         """Create notifications for both users when chat is enabled"""
         try:
-            # Notify claimer
-            self.notification_repository.create({
-                'user_id': claimer_id,
-                'title': 'Claim Approved',
-                'message': f'Your claim for "{item_name}" has been approved. You can now chat with the owner.',
-                'link': f'/chat/conversation/{post_id}',
-                'is_read': False
-            })
-
-            # Notify owner
-            self.notification_repository.create({
-                'user_id': owner_id,
-                'title': 'Chat Enabled',
-                'message': f'You can now chat with the claimer of "{item_name}".',
-                'link': f'/chat/conversation/{post_id}',
-                'is_read': False
-            })
+            self.notification_repository.create_many([
+                # Notify claimer
+                {
+                    'user_id': claimer_id,
+                    'title': 'Claim Approved',
+                    'message': f'Your claim for "{item_name}" has been approved. You can now chat with the owner.',
+                    'link': f'/chat/conversation/{post_id}',
+                    'is_read': False
+                },
+                # Notify owner
+                {
+                    'user_id': owner_id,
+                    'title': 'Chat Enabled',
+                    'message': f'You can now chat with the claimer of "{item_name}".',
+                    'link': f'/chat/conversation/{post_id}',
+                    'is_read': False
+                },
+            ])
             return True
         except Exception as e:
             print(f"Error creating chat notifications: {e}")
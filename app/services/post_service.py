@@ -1,15 +1,18 @@
 from datetime import datetime
-import os
 import pytz
-import logging
 from app.repositories.post_repository import PostRepository
-from app.utils.image_utils import save_image, save_images
+from app.repositories.match_job_repository import MatchJobRepository
+from app.repositories.verification_repository import VerificationRepository
+from app.utils.image_utils import save_image, save_images, release_images
+from app.utils.pagination import DEFAULT_PAGE_SIZE
 from app.services.matching_service import MatchingService
 
 class PostService:
     def __init__(self):
         self.post_repository = PostRepository()
         self.matching_service = MatchingService()
+        self.match_job_repository = MatchJobRepository()
+        self.verification_repository = VerificationRepository()
         self.local_tz = pytz.timezone('Asia/Dhaka') # Set Asia/Dhaka timezone
 
     def get_all_lost_items(self):
@@ -18,6 +21,12 @@ class PostService:
     def get_all_found_items(self):
         return self.post_repository.get_by_type("found")
 
+    def get_lost_items_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return self.post_repository.page_by_type("lost", cursor, page_size)
+
+    def get_found_items_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return self.post_repository.page_by_type("found", cursor, page_size)
+
     def get_user_stats(self, user_id):
         user_posts = self.post_repository.get_by_user_id(user_id)
         lost_items = [p for p in user_posts if p.type == "lost"]
@@ -32,12 +41,18 @@ class PostService:
     def get_by_type_and_user(self, type_name, user_id):
         return self.post_repository.get_by_type_and_user(type_name, user_id)
 
+    def get_page_by_type_and_user(self, type_name, user_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return self.post_repository.page_by_type_and_user(type_name, user_id, cursor, page_size)
+
     def get_by_id(self, post_id):
         return self.post_repository.get_by_id(post_id)
 
     def get_by_user_id(self, user_id):
         return self.post_repository.get_by_user_id(user_id)
 
+    def get_page_by_user_id(self, user_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        return self.post_repository.page_by_user_id(user_id, cursor, page_size)
+
     def create_lost_item(self, form_data, files, user_id):
         lost_date = datetime.strptime(form_data.get('lost_date'), '%Y-%m-%d')
         lost_date = self.local_tz.localize(lost_date)
@@ -59,7 +74,8 @@ class PostService:
             data['images'] = save_image(files['image'])
 
         post = self.post_repository.create(data)
-        self.process_matches(post)
+        # Embedding and matching happen in the match worker, off the request path
+        self.match_job_repository.enqueue(post.id)
         return post
 
     def create_found_item(self, form_data, files, user_id):
@@ -83,78 +99,80 @@ class PostService:
             data['images'] = save_image(files['image'])
 
         post = self.post_repository.create(data)
-        self.process_matches(post)
+        # Embedding and matching happen in the match worker, off the request path
+        self.match_job_repository.enqueue(post.id)
         return post
 
     def update(self, post, form_data=None, files=None):
         try:
+            # Uploads first: save_image commits its image reference
+            replaced = None
+            if files and 'images' in files:
+                new_images = save_images(files)
+                if new_images:
+                    replaced, post.images = post.images, new_images
+
             if form_data:
                 post.description = form_data.get('description', post.description)
                 post.category_name = form_data.get('category', post.category_name)
                 post.location = form_data.get('location', post.location)
 
-            if files and 'images' in files:
-                new_images = save_images(files)
-                if new_images:
-                    post.images = new_images
-
-            return self.post_repository.update(post)
+            post = self.post_repository.update(post)
+            # Every upload took its own reference, so the old set gives all of
+            # its references back, even for an image uploaded again
+            if replaced:
+                release_images(replaced.split(','))
+            # Re-match (and re-score its claims) only when the matchable text actually changed
+            if not self.matching_service.embedding_is_current(post):
+                self.match_job_repository.enqueue(post.id)
+                self.verification_repository.reset_scores(post.id)
+            return post
         except Exception as e:
             print(f"Error updating post: {str(e)}")
             raise
 
     def delete(self, post):
         try:
-            # Delete the post's images from storage if they exist
-            if post.images:
-                for image_name in post.images.split(','):
-                    try:
-                        image_path = os.path.join('static', 'uploads', image_name)
-                        if os.path.exists(image_path):
-                            os.remove(image_path)
-                    except Exception as e:
-                        print(f"Error deleting image {image_name}: {str(e)}")
-
-            # Delete the post from database
-            return self.post_repository.delete(post)
+            # Delete the post from database, then from the match index
+            post_type, post_id, images = post.type, post.id, post.images
+            self.match_job_repository.delete_for_post(post_id)
+            result = self.post_repository.delete(post)
+            self.matching_service.remove_post(post_type, post_id)
+            # Shared images stay until their last post or claim is gone
+            if images:
+                release_images(images.split(','))
+            return result
         except Exception as e:
             print(f"Error deleting post: {str(e)}")
             raise
 
-    def process_matches(self, post):
-        """Find and notify users about potential matches"""
-        try:
-            print(f"Processing matches for post {post.id}")  # Debug log
-            matches = self.matching_service.find_matches(post)
-
-            if matches:
-                print(f"Found {len(matches)} potential matches")  # Debug log
-
-                # Get top 3 matches and notify users
-                for match in matches[:3]:
-                    print(f"Creating notifications for match with score {match['score']}")  # Debug log
-
-                    # Notify the original post owner
-                    self.matching_service.create_match_notification(
-                        post.user_id,
-                        match['post'],
-                        post,
-                        match['score']
-                    )
-
-                    # Notify the matching post owner
-                    self.matching_service.create_match_notification(
-                        match['post'].user_id,
-                        post,
-                        match['post'],
-                        match['score']
-                    )
-            else:
-                print("No matches found")  # Debug log
+    def process_matches_batch(self, posts):
+        """Match many queued posts in one scoring pass and notify their owners.
 
-        except Exception as e:
-            print(f"Error processing matches: {e}")
-            logging.error(f"Error processing matches: {e}")
+        Errors propagate so the match worker can retry the batch.
+        """
+        results = self.matching_service.find_matches_batch(posts, top_k=3)
+        for post in posts:
+            self.notify_matches(post, results.get(post.id, []))
+
+    def notify_matches(self, post, matches):
+        if matches:
+            print(f"Found {len(matches)} potential matches")  # Debug log
+
+            # Get top 3 matches and notify users
+            notifications = []
+            for match in matches[:3]:
+                print(f"Creating notifications for match with score {match['score']}")  # Debug log
+
+                # Notify the original post owner
+                notifications.append((post.user_id, match['post'], post, match['score']))
+
+                # Notify the matching post owner
+                notifications.append((match['post'].user_id, post, match['post'], match['score']))
+
+            self.matching_service.create_match_notifications(notifications)
+        else:
+            print("No matches found")  # Debug log
 
     def search_posts(self, query, filters=None):
         return self.post_repository.search(query, filters)
@@ -1,4 +1,5 @@
 from app.repositories.post_repository import PostRepository
+from app.utils.pagination import DEFAULT_PAGE_SIZE
 
 class SearchService:
     def __init__(self):
@@ -18,3 +19,7 @@ class SearchService:
                 - location: location keyword
         """
         return self.post_repository.search(query, filters)
+
+    def search_posts_page(self, query, filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        """Same as search_posts, one keyset page at a time"""
+        return self.post_repository.search_page(query, filters, cursor, page_size)
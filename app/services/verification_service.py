@@ -1,7 +1,7 @@
-import json
+from app.models.claim_proof_file import ClaimProofFile
+from app.models.verificationClaim import parse_lost_date
 from app.repositories.verification_repository import VerificationRepository
 from app.repositories.post_repository import PostRepository
-from app.repositories.user_repository import UserRepository
 from app.services.notification_service import NotificationService
 from app.utils.image_utils import save_image
 
@@ -10,7 +10,6 @@ class VerificationService:
     def __init__(self):
         self.verification_repository = VerificationRepository()
         self.post_repository = PostRepository()
-        self.user_repository = UserRepository()
         self.notification_service = NotificationService()
 
     def get_post(self, post_id):
@@ -33,13 +32,11 @@ class VerificationService:
         claim_data = {
             'post_id': post_id,
             'user_id': user_id,
-            'proof_details': json.dumps({
-                'lost_location': form_data.get('lost_location'),
-                'lost_date': form_data.get('lost_date'),
-                'unique_identifier': form_data.get('unique_identifier'),
-                'additional_proof': form_data.get('additional_proof'),
-                'proof_files': proof_files
-            })
+            'lost_location': form_data.get('lost_location'),
+            'lost_date': parse_lost_date(form_data.get('lost_date')),
+            'unique_identifier': form_data.get('unique_identifier'),
+            'additional_proof': form_data.get('additional_proof'),
+            'proof_files': [ClaimProofFile(filename=filename) for filename in proof_files]
         }
 
         return self.verification_repository.create_claim(claim_data)
@@ -48,19 +45,7 @@ class VerificationService:
     def get_user_claims(self, user_id):
         """Get all verification claims for user's posts with associated data"""
         claims = self.verification_repository.get_claims_by_post_owner(user_id)
-        claims_data = []
-
-        for claim in claims:
-            post = self.post_repository.get_by_id(claim.post_id)
-            user = self.user_repository.get_by_id(claim.user_id)
-
-            claims_data.append({
-                'claim': claim,
-                'post': post,
-                'user': user
-            })
-
-        return claims_data
+        return [{'claim': claim, 'post': claim.post, 'user': claim.user} for claim in claims]
 
 
     def update_claim_status(self, claim_id, post_id, new_status):
@@ -95,12 +80,10 @@ class VerificationService:
         claims_data = []
 
         for claim in claims:
-            user = self.user_repository.get_by_id(claim.user_id)
-            proof_data = json.loads(claim.proof_details)
             claims_data.append({
                 'claim': claim,
-                'user': user,
-                'proof_data': proof_data
+                'user': claim.user,
+                'proof_data': claim.proof_data
             })
 
         return claims_data
@@ -108,10 +91,10 @@ class VerificationService:
 
     def get_approved_claim(self, post_id):
         """Get the approved claim for a post with user data"""
-        claim = self.verification_repository.get_claim_by_status(post_id=post_id, status='approved')
+        claim = self.verification_repository.get_claim_by_status(
+            post_id=post_id, status='approved', with_user=True)
         if claim:
-            user = self.user_repository.get_by_id(claim.user_id)
-            return {'claim': claim, 'user': user}
+            return {'claim': claim, 'user': claim.user}
         return None
 
 
@@ -1,42 +1,89 @@
-from flask import session
+from flask import session, current_app
 from flask_socketio import emit, join_room, leave_room
-from app.models.chat import Chat
 from app.services.chat_service import ChatService
-from app import socketio, db
+from app.services.notification_push_service import user_room
+from app.utils.event_metrics import timed
+from app import socketio
 
 # Create a ChatService instance
 chat_service = ChatService()
 
+def _int_field(data, key):
+    """data[key] as an int, or None if it is missing or the client sent something else"""
+    try:
+        return int(data[key])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _post_id(data):
+    # Access decisions are cached and invalidated by integer post id, so a
+    # string id from the client must not reach them as-is
+    return _int_field(data, 'post_id')
+
+@socketio.on('connect')
+def on_connect():
+    # Every tab a user has open joins their room for notification pushes
+    if session.get('user_id'):
+        join_room(user_room(session['user_id']))
+
 @socketio.on('join')
+@timed('join')
 def on_join(data):
-    room = f"post_{data['post_id']}"
+    # Access is checked once here; message events reuse the cached decision
+    user_id = session.get('user_id')
+    post_id = _post_id(data)
+    if not user_id or post_id is None or not chat_service.authorize(user_id, post_id):
+        return
+    room = f"post_{post_id}"
     join_room(room)
 
+    # A reconnecting client sends the newest message id it has; send it what it missed
+    # (an id that is not a number is ignored, as if none was sent)
+    last_seen_id = _int_field(data, 'last_seen_id')
+    if last_seen_id is None:
+        return
+    limit = current_app.config["CHAT_CATCH_UP_LIMIT"]
+    messages = chat_service.get_post_chats_since(post_id, user_id, last_seen_id, limit)
+    emit('catch_up', {
+        'post_id': post_id,
+        'messages': [chat_service.serialize_message(message) for message in messages],
+        # The client missed more than fits; it should reload the conversation
+        'truncated': len(messages) == limit
+    })
+
 @socketio.on('leave')
 def on_leave(data):
-    room = f"post_{data['post_id']}"
+    post_id = _post_id(data)
+    if post_id is None:
+        return
+    room = f"post_{post_id}"
     leave_room(room)
 
 @socketio.on('mark_read')
+@timed('mark_read')
 def on_mark_read(data):
-    room = f"post_{data['post_id']}"
-    socketio.emit('messages_read', {
-        'post_id': data['post_id'],
-        'reader_id': session['user_id']
-    }, room=room)
+    post_id = _post_id(data)
+    if not session.get('user_id') or post_id is None:
+        return
+    # Emits messages_read to the room when any messages were flipped
+    chat_service.mark_messages_read(post_id, session['user_id'])
 
 @socketio.on('message')
+@timed('message')
 def handle_message(data):
-    if not session.get('user_id'):
+    post_id = _post_id(data)
+    if not session.get('user_id') or post_id is None:
         return
 
     message_data = chat_service.create_message(
-        post_id=data['post_id'],
+        post_id=post_id,
         sender_id=session['user_id'],
         receiver_id=data['receiver_id'],
         message_text=data['message']
     )
 
     if message_data:
-        room = f"post_{data['post_id']}"
+        room = f"post_{post_id}"
         emit('message', message_data, room=room)
+    # Acknowledge to the sender; with write-behind the message is queued, not yet saved
+    return message_data
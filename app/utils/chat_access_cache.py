@@ -0,0 +1,40 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app import app, db
+from app.models.post import Post
+from app.models.verificationClaim import VerificationClaim
+from app.utils.cache import TTLCache
+
+# (user_id, post_id) -> whether the user may chat about the post
+chat_access_cache = TTLCache(ttl=app.config["CHAT_ACCESS_CACHE_TTL"])
+
+
+def invalidate_post(post_id, session=None):
+    """Forget every access decision for a post once the current transaction commits"""
+    session = session or db.session
+    session.info.setdefault('chat_access_dirty', set()).add(post_id)
+
+
+@event.listens_for(VerificationClaim, 'after_insert')
+@event.listens_for(VerificationClaim, 'after_update')
+@event.listens_for(VerificationClaim, 'after_delete')
+def _claim_changed(mapper, connection, target):
+    invalidate_post(target.post_id, object_session(target))
+
+
+@event.listens_for(Post, 'after_update')
+@event.listens_for(Post, 'after_delete')
+def _post_changed(mapper, connection, target):
+    invalidate_post(target.id, object_session(target))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    post_ids = session.info.pop('chat_access_dirty', None)
+    if post_ids:
+        chat_access_cache.invalidate_where(lambda key: key[1] in post_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('chat_access_dirty', None)
@@ -0,0 +1,136 @@
+import click
+
+
+def register_commands(app):
+    @app.cli.command("match-worker")
+    @click.option("--batch-size", type=int, default=None, help="Jobs claimed per batch.")
+    @click.option("--poll-interval", type=float, default=None, help="Seconds to wait when the queue is empty.")
+    @click.option("--once", is_flag=True, help="Process a single batch and exit.")
+    def match_worker(batch_size, poll_interval, once):
+        """Run the background matching worker."""
+        from app.services.match_worker_service import MatchWorkerService
+        from app.services.notification_push_service import NotificationPushService
+
+        NotificationPushService.configure_for_worker()
+        worker = MatchWorkerService(batch_size or app.config["MATCH_WORKER_BATCH_SIZE"])
+        if once:
+            click.echo(f"Processed {worker.run_once()} match jobs")
+            click.echo(f"Scored {worker.score_claims_once()} verification claims")
+            return
+        worker.run_forever(poll_interval or app.config["MATCH_WORKER_POLL_INTERVAL"])
+
+    @app.cli.command("score-claims")
+    @click.option("--rescore", is_flag=True, help="Score every claim again, not just new ones.")
+    @click.option("--batch-size", type=int, default=None, help="Claims scored per batch.")
+    def score_claims(rescore, batch_size):
+        """Score unscored verification claims now instead of waiting for the worker."""
+        from app.repositories.verification_repository import VerificationRepository
+        from app.services.claim_scoring_service import ClaimScoringService
+
+        if rescore:
+            VerificationRepository().reset_scores()
+        service = ClaimScoringService()
+        total = 0
+        while True:
+            scored = service.score_pending(batch_size or app.config["MATCH_WORKER_BATCH_SIZE"])
+            if not scored:
+                break
+            total += scored
+        click.echo(f"Scored {total} verification claims")
+
+    @app.cli.command("generate-image-variants")
+    def generate_image_variants():
+        """Create thumbnail and medium WebP variants for older uploads."""
+        from app.utils.image_utils import generate_missing_variants
+
+        click.echo(f"Created variants for {generate_missing_variants()} images")
+
+    @app.cli.command("reconcile-image-references")
+    @click.option("--grace", type=int, default=3600, help="Skip images touched in the last N seconds.")
+    def reconcile_image_references(grace):
+        """Recount image references from posts and claim proofs; delete unused images."""
+        from app.repositories.image_repository import ImageRepository
+        from app.utils.image_utils import delete_image
+
+        corrected, unused = ImageRepository.reconcile(grace)
+        for filename in unused:
+            delete_image(filename)
+        click.echo(f"Corrected {corrected} image reference counts, deleted {len(unused)} unused images")
+
+    @app.cli.command("check-query-plans")
+    @click.option("--verbose", is_flag=True, help="Print the plan of every statement.")
+    def check_query_plans_command(verbose):
+        """Fail if a repository query falls back to a full table scan."""
+        from app.utils.query_plan import check_query_plans
+
+        failures = 0
+        for name, statement, plan, scans, allowed in check_query_plans():
+            if scans and not allowed:
+                failures += 1
+                click.echo(f"FULL SCAN  {name}: {', '.join(scans)}")
+                click.echo(f"    {' '.join(statement.split())}")
+            elif verbose:
+                status = "allowed" if scans else "ok"
+                click.echo(f"{status:<10} {name}: {' | '.join(plan)}")
+
+        if failures:
+            raise click.ClickException(f"{failures} repository queries scan whole tables")
+        click.echo("All repository queries use indexes")
+
+    @app.cli.command("check-query-counts")
+    @click.option("--verbose", is_flag=True, help="Print every statement a page issued.")
+    def check_query_counts_command(verbose):
+        """Fail if a claim page issues more queries than its budget (an N+1)."""
+        from app.utils.query_count import check_page_query_counts
+
+        results = check_page_query_counts()
+        if not results:
+            click.echo("No verification claims in the database; nothing to check")
+            return
+
+        failures = 0
+        for endpoint, claims, status, statements, budget in results:
+            ok = status == 200 and len(statements) <= budget
+            failures += not ok
+            click.echo(f"{'ok' if ok else 'FAIL':<6} {endpoint}: {len(statements)} queries "
+                       f"for {claims} claims (budget {budget}, HTTP {status})")
+            if verbose or not ok:
+                for statement in statements:
+                    click.echo(f"    {' '.join(statement.split())}")
+
+        if failures:
+            raise click.ClickException(f"{failures} pages exceed their query budget")
+        click.echo("All claim pages are within their query budgets")
+
+    @app.cli.command("prune-notifications")
+    @click.option("--days", type=int, default=None, help="Archive read notifications older than this.")
+    @click.option("--batch-size", type=int, default=None, help="Notifications moved per transaction.")
+    def prune_notifications(days, batch_size):
+        """Collapse repeated match notifications and archive old read ones."""
+        from app.services.notification_retention_service import NotificationRetentionService
+
+        service = NotificationRetentionService(
+            batch_size or app.config["NOTIFICATION_RETENTION_BATCH_SIZE"],
+            app.config["NOTIFICATION_RETENTION_PAUSE"],
+        )
+        result = service.run(days if days is not None else app.config["NOTIFICATION_RETENTION_DAYS"])
+        click.echo(f"Collapsed {result['collapsed']} repeated match notifications, "
+                   f"archived {result['expired']} expired ones")
+
+    @app.cli.command("socket-broker")
+    @click.option("--host", default="127.0.0.1", help="Interface to listen on.")
+    @click.option("--port", type=int, default=5655, help="Port to listen on.")
+    def socket_broker(host, port):
+        """Run the local Socket.IO message broker (SOCKETIO_MESSAGE_QUEUE=local://host:port)."""
+        from app.utils.socket_queue import run_broker
+
+        click.echo(f"Socket broker listening on {host}:{port}")
+        run_broker(host, port)
+
+    @app.cli.command("reconcile-unread-counters")
+    def reconcile_unread_counters():
+        """Recompute every user's unread counters from notifications and chats."""
+        from app.repositories.user_repository import UserRepository
+
+        drifted = UserRepository.reconcile_unread_counts()
+        click.echo(f"Corrected unread counters for {len(drifted)} users")
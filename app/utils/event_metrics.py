@@ -0,0 +1,62 @@
+import time
+import logging
+import threading
+from collections import deque
+from functools import wraps
+
+
+class EventLatency:
+    """Rolling latency samples per Socket.IO event, kept per process.
+
+    Every LOG_EVERY events of a kind, the count and p50/p95/max of the last
+    SAMPLES handler runs are logged.
+    """
+
+    SAMPLES = 1000
+    LOG_EVERY = 500
+
+    _samples = {}
+    _counts = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(cls, event_name, seconds):
+        with cls._lock:
+            cls._samples.setdefault(event_name, deque(maxlen=cls.SAMPLES)).append(seconds)
+            cls._counts[event_name] = cls._counts.get(event_name, 0) + 1
+            should_log = cls._counts[event_name] % cls.LOG_EVERY == 0
+        if should_log:
+            stats = cls.snapshot()[event_name]
+            logging.info(f"Socket event '{event_name}': {stats['count']} handled, "
+                         f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+                         f"max {stats['max_ms']:.1f} ms")
+
+    @classmethod
+    def snapshot(cls):
+        """{event: {'count', 'p50_ms', 'p95_ms', 'max_ms'}} over the recent samples"""
+        with cls._lock:
+            samples = {name: sorted(values) for name, values in cls._samples.items()}
+            counts = dict(cls._counts)
+        return {
+            name: {
+                'count': counts[name],
+                'p50_ms': values[len(values) // 2] * 1000,
+                'p95_ms': values[min(int(len(values) * 0.95), len(values) - 1)] * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+            for name, values in samples.items() if values
+        }
+
+
+def timed(event_name):
+    """Record how long a Socket.IO handler takes under `event_name`"""
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                EventLatency.record(event_name, time.perf_counter() - started)
+        return wrapper
+    return decorator
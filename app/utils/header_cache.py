@@ -0,0 +1,45 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app import app, db
+from app.models.chat import Chat
+from app.models.notification import Notification
+from app.utils.cache import TTLCache
+
+# Per-user navbar data (recent notifications and unread badges)
+header_cache = TTLCache(ttl=app.config["HEADER_CACHE_TTL"])
+
+
+def mark_dirty(user_id, session=None):
+    """Drop a user's cached header once the current transaction commits.
+
+    Waiting for the commit stops a concurrent request from re-caching the
+    pre-commit state. ORM writes are tracked automatically below; bulk
+    UPDATE/DELETE statements must call this themselves.
+    """
+    session = session or db.session
+    session.info.setdefault('header_cache_dirty', set()).add(user_id)
+
+
+@event.listens_for(Notification, 'after_insert')
+@event.listens_for(Notification, 'after_update')
+@event.listens_for(Notification, 'after_delete')
+def _notification_changed(mapper, connection, target):
+    mark_dirty(target.user_id, object_session(target))
+
+
+@event.listens_for(Chat, 'after_insert')
+@event.listens_for(Chat, 'after_update')
+@event.listens_for(Chat, 'after_delete')
+def _chat_changed(mapper, connection, target):
+    mark_dirty(target.receiver_id, object_session(target))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop('header_cache_dirty', ()):
+        header_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('header_cache_dirty', None)
@@ -1,33 +1,138 @@
 import os
 import uuid
-from werkzeug.utils import secure_filename
-from flask import current_app
+import hashlib
+import tempfile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from flask import current_app, url_for
+from app.repositories.image_repository import ImageRepository
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Stored extension for each accepted Pillow format; the upload's own name is not trusted.
+# Many phone cameras write MPO (a JPEG with extra frames); it is stored as a plain JPEG.
+FORMAT_EXTENSIONS = {'PNG': 'png', 'JPEG': 'jpg', 'MPO': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+SAVE_FORMATS = {'MPO': 'JPEG'}
+CHUNK_SIZE = 64 * 1024
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def variant_filename(filename, variant):
+    """`<stem>_<variant>.webp` next to the original upload"""
+    return f"{filename.rsplit('.', 1)[0]}_{variant}.webp"
+
+def _upload_path(filename):
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
+
+def _flatten(image, keep_alpha):
+    """RGB, or RGBA when the format can store transparency and the image has it"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        return image.convert('RGBA') if keep_alpha else image.convert('RGB')
+    return image.convert('RGB')
+
+def _partial_path(final_path):
+    """A temp name next to `final_path`, unique to this write"""
+    return f"{final_path}.{uuid.uuid4().hex}.partial"
+
+def write_variants(image, filename):
+    """Save the WebP variants of an (already upright) image.
+
+    Each is written under a temp name and renamed into place, so a concurrent
+    upload of the same bytes never serves a half-written variant.
+    """
+    for variant, size in current_app.config["IMAGE_VARIANTS"].items():
+        resized = _flatten(image, keep_alpha=True)
+        resized.thumbnail((size, size), Image.LANCZOS)
+        final_path = _upload_path(variant_filename(filename, variant))
+        partial_path = _partial_path(final_path)
+        try:
+            resized.save(partial_path, 'WEBP',
+                         quality=current_app.config["IMAGE_WEBP_QUALITY"], method=4)
+            os.replace(partial_path, final_path)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+def process_image(source_path, filename):
+    """Store an upload as `filename`: upright, at most IMAGE_MAX_DIMENSION on
+    its long side and with EXIF/metadata dropped, plus its WebP variants.
+
+    The original is written last and renamed into place, so once it exists
+    its variants do too.
+    """
+    final_path = _upload_path(filename)
+    partial_path = _partial_path(final_path)
+    with Image.open(source_path) as image:
+        image.load()
+        image_format = SAVE_FORMATS.get(image.format, image.format)
+        # Animated GIFs keep their frames; only the variants are stills. An
+        # MPO's extra frames are previews or depth maps and are dropped.
+        animated = getattr(image, 'is_animated', False) and image_format == image.format
+        upright = ImageOps.exif_transpose(image)
+        write_variants(upright, filename)
+        if animated:
+            with open(source_path, 'rb') as source, open(partial_path, 'wb') as out:
+                while chunk := source.read(CHUNK_SIZE):
+                    out.write(chunk)
+        else:
+            max_dimension = current_app.config["IMAGE_MAX_DIMENSION"]
+            upright = _flatten(upright, keep_alpha=image_format in ('PNG', 'WEBP', 'GIF'))
+            upright.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            options = {'quality': 85, 'optimize': True} if image_format in ('JPEG', 'WEBP') else {'optimize': True}
+            # Not passing exif= (or icc/xmp) is what strips the metadata
+            upright.save(partial_path, image_format, **options)
+    os.replace(partial_path, final_path)
+
+def _stream_to_temp(stream, folder):
+    """Copy an upload to a temp file in `folder` chunk by chunk; returns (sha256 hex, path)"""
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(dir=folder, suffix='.upload')
+    with os.fdopen(fd, 'wb') as out:
+        while chunk := stream.read(CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest(), path
+
 def save_image(file):
+    """Store an upload under the SHA-256 of its bytes and take a reference to it.
+
+    Identical uploads share one file (and its variants); release_images drops
+    the reference again. Returns the stored filename, or None if the upload
+    is not an accepted image.
+    """
     if not file or not file.filename:
         return None
-        
+
     try:
         if not allowed_file(file.filename):
             return None
-            
-        filename = secure_filename(file.filename)
-        ext = filename.rsplit('.', 1)[1].lower()
-        new_filename = f"{uuid.uuid4()}.{ext}"
-        
-        # Changed path to use static/uploads directly from project root
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'uploads')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        file_path = os.path.join(upload_folder, new_filename)
-        file.save(file_path)  # Add this line to actually save the file
-        return new_filename
-        
+
+        os.makedirs(current_app.config["UPLOAD_FOLDER"], exist_ok=True)
+        digest, temp_path = _stream_to_temp(file.stream, current_app.config["UPLOAD_FOLDER"])
+        try:
+            with Image.open(temp_path) as probe:
+                ext = FORMAT_EXTENSIONS.get(probe.format)
+            if not ext:
+                print(f"Rejected upload in an unsupported format: {file.filename}")
+                return None
+
+            filename = f"{digest}.{ext}"
+            # Referenced before the file is written, so a concurrent release
+            # of the same bytes cannot delete it out from under us
+            ImageRepository.add_reference(filename)
+            try:
+                if not os.path.exists(_upload_path(filename)):
+                    process_image(temp_path, filename)
+            except Exception:
+                ImageRepository.release([filename])
+                raise
+            return filename
+        finally:
+            os.remove(temp_path)
+
+    except UnidentifiedImageError:
+        print(f"Rejected upload that is not an image: {file.filename}")
+        return None
     except Exception as e:
         print(f"Error saving file: {str(e)}")
         return None
@@ -36,12 +141,61 @@ def save_images(files):
     """Save multiple images and return comma-separated filenames"""
     if not files:
         return None
-        
+
     saved_files = []
     for file in files.getlist('images'):
         if file.filename:
             filename = save_image(file)
             if filename:
                 saved_files.append(filename)
-                
-    return ','.join(saved_files) if saved_files else None
\ No newline at end of file
+
+    return ','.join(saved_files) if saved_files else None
+
+def release_images(filenames):
+    """Drop one reference to each upload and delete the files nobody uses any more"""
+    for filename in ImageRepository.release(filenames):
+        # Re-check: the same bytes may have been uploaded again since the release
+        if not ImageRepository.is_referenced(filename):
+            delete_image(filename)
+
+def delete_image(filename):
+    """Remove an upload and its variants"""
+    names = [filename] + [variant_filename(filename, variant)
+                          for variant in current_app.config["IMAGE_VARIANTS"]]
+    for name in names:
+        try:
+            path = _upload_path(name)
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            print(f"Error deleting image {name}: {str(e)}")
+
+def image_url(filename, variant=None):
+    """Template helper: URL of an upload's `variant` ('thumb', 'medium'),
+    falling back to the original for uploads made before variants existed"""
+    if not filename:
+        return None
+    if variant:
+        name = variant_filename(filename, variant)
+        if os.path.exists(_upload_path(name)):
+            return url_for('static', filename='uploads/' + name)
+    return url_for('static', filename='uploads/' + filename)
+
+def generate_missing_variants():
+    """Create variants for uploads that predate the pipeline; returns how many images were processed"""
+    folder = current_app.config["UPLOAD_FOLDER"]
+    variants = current_app.config["IMAGE_VARIANTS"]
+    suffixes = tuple(f"_{variant}.webp" for variant in variants)
+    processed = 0
+    for name in sorted(os.listdir(folder)):
+        if not allowed_file(name) or name.endswith(suffixes):
+            continue
+        if all(os.path.exists(_upload_path(variant_filename(name, v))) for v in variants):
+            continue
+        try:
+            with Image.open(_upload_path(name)) as image:
+                write_variants(ImageOps.exif_transpose(image), name)
+            processed += 1
+        except Exception as e:
+            print(f"Error creating variants for {name}: {str(e)}")
+    return processed
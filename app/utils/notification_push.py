@@ -0,0 +1,41 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+
+def push_after_commit(notifications, session=None):
+    """Queue notifications for a Socket.IO push once the current transaction commits.
+
+    Takes Notification rows or dicts with the same keys. They are serialized
+    now, while the values are loaded, and dropped if the transaction rolls back.
+    """
+    session = session or db.session
+    session.info.setdefault('notification_push', []).extend(
+        serialize(notification) for notification in notifications)
+
+
+def serialize(notification):
+    get = notification.get if isinstance(notification, dict) else \
+        lambda key: getattr(notification, key)
+    created_at = get('created_at')
+    return {
+        'id': get('id'),
+        'user_id': get('user_id'),
+        'title': get('title'),
+        'message': get('message'),
+        'link': get('link'),
+        'created_at': created_at.strftime('%Y-%m-%d %H:%M') if created_at else None,
+    }
+
+
+@event.listens_for(Session, 'after_commit')
+def _push_after_commit(session):
+    notifications = session.info.pop('notification_push', None)
+    if notifications:
+        from app.services.notification_push_service import NotificationPushService
+        NotificationPushService().queue(notifications)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('notification_push', None)
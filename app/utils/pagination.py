@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from flask import request, url_for
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 96
+
+
+class Page:
+    """One page of a keyset-paginated listing"""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    encoded = [{"dt": value.isoformat()} if isinstance(value, datetime) else value
+               for value in values]
+    return base64.urlsafe_b64encode(json.dumps(encoded).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the key values stored in a cursor, or None when it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return [datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+                for value in values]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def clamp_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def keyset_paginate(query, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Fetch the page after `cursor` from a query ordered by `keys`.
+
+    keys is a list of (column, descending) pairs that must end in a unique
+    column such as the primary key. The cursor holds the last row's key
+    values, so a page costs one index range scan however deep it is. Items
+    are entities for a single-entity query and named rows otherwise.
+    """
+    single_entity = len(query.column_descriptions) == 1
+    columns = [column for column, _ in keys]
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(keys):
+        query = query.filter(_after(keys, values))
+
+    order_by = [column.desc() if descending else column.asc() for column, descending in keys]
+    rows = query.add_columns(*columns).order_by(*order_by).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(list(rows[-1][-len(keys):]))
+    return Page([row[0] if single_entity else row for row in rows], next_cursor)
+
+
+def _after(keys, values):
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with < for descending keys
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def page_links(page):
+    """URLs for the next page and for going back to the first one"""
+    args = {**(request.view_args or {}), **request.args.to_dict()}
+    cursor = args.pop("cursor", None)
+    return {
+        "next_url": url_for(request.endpoint, **args, cursor=page.next_cursor)
+        if page.has_next else None,
+        "first_url": url_for(request.endpoint, **args) if cursor else None,
+    }
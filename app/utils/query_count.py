@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+from flask import url_for
+from sqlalchemy import event, func
+from app import app, db
+from app.models.post import Post
+from app.models.verificationClaim import VerificationClaim
+
+# Statements a page may issue for its own content, however many claims it
+# lists. The header's notifications and counters are cached and excluded by
+# rendering each page once before counting.
+PAGE_QUERY_BUDGETS = {
+    "dashboard.all_claims": 1,      # claims joined to their posts and claimants
+    "verification.view_claims": 3,  # the post, its claims joined to claimants, their proof files
+}
+
+
+@contextmanager
+def count_statements():
+    """Collect every statement sent to the database inside the block"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+
+def busiest_claims():
+    """(post_id, owner_id, claim_count) of the post with the most claims"""
+    row = (db.session.query(Post.id, Post.user_id, func.count(VerificationClaim.id))
+           .join(VerificationClaim, VerificationClaim.post_id == Post.id)
+           .group_by(Post.id)
+           .order_by(func.count(VerificationClaim.id).desc())
+           .first())
+    return tuple(row) if row else None
+
+
+def check_page_query_counts():
+    """Render the claim pages as the owner of the most-claimed post and
+    return [(endpoint, claim_count, status_code, statements, budget)]."""
+    busiest = busiest_claims()
+    if busiest is None:
+        return []
+    post_id, owner_id, claim_count = busiest
+    owner_claims = (VerificationClaim.query.join(Post)
+                    .filter(Post.user_id == owner_id).count())
+    with app.test_request_context():
+        pages = [
+            ("dashboard.all_claims", url_for("dashboard.all_claims"), owner_claims),
+            ("verification.view_claims", url_for("verification.view_claims", post_id=post_id), claim_count),
+        ]
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = owner_id
+
+    results = []
+    for endpoint, path, claims in pages:
+        # Warm the header cache so only the page's own statements are counted
+        client.get(path)
+        with count_statements() as statements:
+            response = client.get(path)
+        results.append((endpoint, claims, response.status_code, statements, PAGE_QUERY_BUDGETS[endpoint]))
+    return results
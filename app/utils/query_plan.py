@@ -0,0 +1,137 @@
+import re
+from datetime import datetime
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.models.post import Post
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.embedding_repository import EmbeddingRepository
+from app.repositories.match_job_repository import MatchJobRepository
+from app.repositories.notification_repository import NotificationRepository
+from app.repositories.post_repository import PostRepository
+from app.repositories.report_repository import ReportRepository
+from app.repositories.user_repository import UserRepository
+from app.repositories.verification_repository import VerificationRepository
+
+# A plan step that walks a whole table: "SCAN post" (or "SCAN TABLE post" on
+# SQLite < 3.36), and also "SCAN post USING INDEX ...", which reads every
+# index entry and then every row behind it. Only a covering index scan, which
+# never touches the table, passes; lookups by key or rowid are SEARCH steps.
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)\b(?! USING COVERING INDEX )")
+# "MATERIALIZE anon_1": a subquery built into a temp table. Scanning that is
+# reading the subquery's own (already index-searched) result, not a table.
+MATERIALIZED = re.compile(r"^MATERIALIZE (\w+)$")
+
+
+def repository_queries(user_id, post_id):
+    """(name, call, allow_full_scan) for every read query the repositories issue.
+
+    Writes are left out because the repositories commit them. Admin-only
+    listings, substring search and the retention job's duplicate sweep are
+    allowed to scan: they read (nearly) every row by design. So is the home
+    page's recent posts, which walks ix_post_post_date and stops at its LIMIT.
+    """
+    chats = ChatRepository()
+    embeddings = EmbeddingRepository()
+    jobs = MatchJobRepository()
+    notifications = NotificationRepository()
+    posts = PostRepository()
+    reports = ReportRepository()
+    users = UserRepository()
+    claims = VerificationRepository()
+
+    return [
+        ("ChatRepository.get_post_chats", lambda: chats.get_post_chats(post_id, user_id), False),
+        ("ChatRepository.page_post_chats", lambda: chats.page_post_chats(post_id, user_id), False),
+        ("ChatRepository.get_post_chats_since", lambda: chats.get_post_chats_since(post_id, user_id, 0, 200), False),
+        ("ChatRepository.get_first_other_sender_id", lambda: chats.get_first_other_sender_id(post_id, user_id), False),
+        ("ChatRepository.page_inbox", lambda: chats.page_inbox(user_id), False),
+        ("ChatRepository.get_verification_claim", lambda: chats.get_verification_claim(post_id), False),
+        ("ChatRepository.get_unread_messages_count", lambda: chats.get_unread_messages_count(user_id), False),
+        ("EmbeddingRepository.get_by_post_id", lambda: embeddings.get_by_post_id(post_id), False),
+        ("EmbeddingRepository.get_by_post_ids", lambda: embeddings.get_by_post_ids([post_id]), False),
+        ("MatchJobRepository.count_by_status", lambda: jobs.count_by_status(), False),
+        ("NotificationRepository.get_by_id", lambda: notifications.get_by_id(1), False),
+        ("NotificationRepository.page_user_notifications", lambda: notifications.page_user_notifications(user_id), False),
+        ("NotificationRepository.get_expired_ids", lambda: notifications.get_expired_ids(datetime.utcnow(), 100), False),
+        ("NotificationRepository.get_superseded_ids", lambda: notifications.get_superseded_ids("Potential Match Found!", 100), True),
+        ("PostRepository.get_by_type", lambda: posts.get_by_type("lost"), False),
+        ("PostRepository.page_by_type", lambda: posts.page_by_type("lost"), False),
+        ("PostRepository.get_by_id", lambda: posts.get_by_id(post_id), False),
+        ("PostRepository.get_by_ids", lambda: posts.get_by_ids([post_id]), False),
+        ("PostRepository.get_ids_by_type", lambda: posts.get_ids_by_type("lost"), False),
+        ("PostRepository.get_candidate_ids", lambda: posts.get_candidate_ids("lost", categories=["Keys"]), False),
+        ("PostRepository.count_by_type", lambda: posts.count_by_type("lost"), False),
+        ("PostRepository.get_by_user_id", lambda: posts.get_by_user_id(user_id), False),
+        ("PostRepository.page_by_user_id", lambda: posts.page_by_user_id(user_id), False),
+        ("PostRepository.get_recent_posts", lambda: posts.get_recent_posts(6), True),
+        ("PostRepository.get_by_type_and_user", lambda: posts.get_by_type_and_user("lost", user_id), False),
+        ("PostRepository.page_by_type_and_user", lambda: posts.page_by_type_and_user("lost", user_id), False),
+        ("PostRepository.count_user_posts", lambda: posts.count_user_posts(user_id, "lost"), False),
+        ("PostRepository.count_all", lambda: posts.count_all(), False),
+        ("PostRepository.search (keywords)", lambda: posts.search_page("key", {"type": "lost"}), True),
+        ("PostRepository.search (filters only)", lambda: posts.search_page("", {"category": "Keys"}), True),
+        ("ReportRepository.get_recent", lambda: reports.get_recent(5), True),
+        ("ReportRepository.count_by_status", lambda: reports.count_by_status("pending"), True),
+        ("UserRepository.get_by_id", lambda: users.get_by_id(user_id), False),
+        ("UserRepository.get_by_email", lambda: users.get_by_email("user@test.com"), False),
+        ("UserRepository.get_top_contributors", lambda: users.get_top_contributors(5), True),
+        ("UserRepository.count_active", lambda: users.count_active(), True),
+        ("UserRepository.get_all", lambda: users.get_all(), True),
+        ("VerificationRepository.get_claims_by_post_owner", lambda: claims.get_claims_by_post_owner(user_id), False),
+        ("VerificationRepository.get_by_post_and_user", lambda: claims.get_by_post_and_user(post_id, user_id), False),
+        ("VerificationRepository.get_pending_claims_count", lambda: claims.get_pending_claims_count(user_id), False),
+        ("VerificationRepository.get_claims_by_post", lambda: claims.get_claims_by_post(post_id), False),
+        ("VerificationRepository.get_unscored", lambda: claims.get_unscored(16), False),
+        ("VerificationRepository.get_claim_by_status", lambda: claims.get_claim_by_status(post_id, "approved", user_id), False),
+    ]
+
+
+def explain(statement, parameters):
+    rows = db.session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    ).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans():
+    """Run every repository query, EXPLAIN each statement it issued and
+    return [(name, statement, plan, full_scan_tables, allowed)]."""
+    user = User.query.first()
+    post = Post.query.first()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    results = []
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for name, call, allow_full_scan in repository_queries(
+                user.id if user else 1, post.id if post else 1):
+            captured.clear()
+            # Start from an empty identity map so get() really hits the database
+            db.session.expunge_all()
+            try:
+                call()
+            except Exception:
+                # get_or_404 on an empty table; the statement was still captured
+                db.session.rollback()
+            statements = list(captured)
+            for statement, parameters in statements:
+                try:
+                    plan = explain(statement, parameters)
+                except Exception as e:
+                    # e.g. a table from an unapplied migration; report it as a failure
+                    db.session.rollback()
+                    results.append((name, statement, [f"ERROR {e.__class__.__name__}"], ["?"], False))
+                    continue
+                materialized = {m.group(1) for m in map(MATERIALIZED.match, plan) if m}
+                scans = [m.group(1) for m in map(FULL_SCAN.match, plan)
+                         if m and m.group(1) not in materialized]
+                results.append((name, statement, plan, scans, allow_full_scan))
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return results
@@ -0,0 +1,175 @@
+import pickle
+import socket
+import struct
+import logging
+import threading
+import socketserver
+from urllib.parse import urlparse
+from socketio import PubSubManager
+
+# Frames on the local broker are a 4-byte big-endian length and a pickled dict
+HEADER = struct.Struct(">I")
+
+
+def socketio_options(url, channel):
+    """SocketIO() keyword arguments for a message queue URL.
+
+    No URL means a single process. local://host:port uses LocalBrokerManager
+    and `flask socket-broker`; any other URL (redis://, amqp://, kafka://,
+    zmq+tcp://) is handed to Flask-SocketIO's own backends.
+    """
+    if not url:
+        return {}
+    if url.startswith("local://"):
+        return {"client_manager": LocalBrokerManager(url, channel=channel)}
+    return {"message_queue": url, "channel": channel}
+
+
+def _send_frame(sock, data):
+    payload = pickle.dumps(data)
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    buffer = b""
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("broker connection closed")
+        buffer += chunk
+    return buffer
+
+
+def _recv_frame(sock):
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return _recv_exactly(sock, size)
+
+
+class LocalBrokerManager(PubSubManager):
+    """python-socketio client manager backed by the local TCP broker.
+
+    A stand-in for Redis when running several workers on one machine or in
+    tests. Like the Redis backend it pickles messages, so the broker must
+    only listen where trusted processes can reach it.
+    """
+
+    name = "local"
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, url="local://127.0.0.1:5655", channel="socketio",
+                 write_only=False, logger=None, json=None):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or "127.0.0.1", parsed.port or 5655)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+
+    def _socket_module(self):
+        # Under eventlet the listener runs as a green thread and must not block the hub
+        if self.server is not None and self.server.async_mode == "eventlet":
+            from eventlet.green import socket as green_socket
+            return green_socket
+        return socket
+
+    def _connect(self, role):
+        sock = self._socket_module().create_connection(self.address)
+        sock.sendall(f"{role} {self.channel}\n".encode())
+        return sock
+
+    def _publish(self, data):
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect("PUB")
+                    _send_frame(self._publisher, data)
+                    return
+                except OSError:
+                    # One retry on a fresh connection, e.g. after a broker restart
+                    self._publisher = None
+                    if attempt:
+                        raise
+
+    def _listen(self):
+        while True:
+            try:
+                subscriber = self._connect("SUB")
+            except OSError as e:
+                self._get_logger().error(f"Cannot reach socket broker at {self.address}: {e}")
+                self.server.sleep(self.RECONNECT_DELAY)
+                continue
+            try:
+                while True:
+                    yield pickle.loads(_recv_frame(subscriber))
+            except (OSError, ConnectionError) as e:
+                self._get_logger().error(f"Lost socket broker connection: {e}")
+                subscriber.close()
+                self.server.sleep(self.RECONNECT_DELAY)
+
+
+class LocalBroker(socketserver.ThreadingTCPServer):
+    """Fans every frame published on a channel out to that channel's subscribers"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _BrokerHandler)
+        self.subscribers = {}
+        self.lock = threading.Lock()
+        # Publisher threads share subscriber sockets; one fan-out at a time keeps frames whole
+        self.send_lock = threading.Lock()
+
+    def publish(self, channel, frame):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        message = HEADER.pack(len(frame)) + frame
+        with self.send_lock:
+            for subscriber in subscribers:
+                try:
+                    subscriber.sendall(message)
+                except OSError:
+                    self.unsubscribe(channel, subscriber)
+
+    def subscribe(self, channel, sock):
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(sock)
+
+    def unsubscribe(self, channel, sock):
+        with self.lock:
+            self.subscribers.get(channel, set()).discard(sock)
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        role, _, channel = self.rfile.readline().decode().strip().partition(" ")
+        if role == "SUB":
+            self.server.subscribe(channel, self.request)
+            try:
+                # Subscribers never send; this returns when they disconnect
+                while self.request.recv(1024):
+                    pass
+            except OSError:
+                pass
+            finally:
+                self.server.unsubscribe(channel, self.request)
+        elif role == "PUB":
+            # Read through rfile: it may already hold bytes buffered past the hello line
+            while True:
+                header = self.rfile.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+                (size,) = HEADER.unpack(header)
+                frame = self.rfile.read(size)
+                if len(frame) < size:
+                    return
+                self.server.publish(channel, frame)
+        else:
+            logging.warning(f"Socket broker: unknown role {role!r}")
+
+
+def run_broker(host="127.0.0.1", port=5655):
+    """Serve the local broker until interrupted"""
+    with LocalBroker((host, port)) as broker:
+        logging.info(f"Socket broker listening on {host}:{port}")
+        broker.serve_forever()
@@ -0,0 +1,209 @@
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+
+
+def normalize(vectors):
+    """Scale vectors to unit length so a dot product is a cosine similarity"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """Inverted-file (IVF) index for approximate cosine nearest-neighbour search.
+
+    Vectors are bucketed under their nearest k-means centroid and a query only
+    scans the n_probe closest buckets. Until the index holds min_train_size
+    vectors everything lives in one bucket, so small indexes are exact.
+    synced_at is left to the owner to record how fresh the vectors are; it is
+    saved with them.
+    """
+
+    def __init__(self, dimensions, min_train_size=2048, n_probe=16, retrain_growth=4):
+        self.dimensions = dimensions
+        self.min_train_size = min_train_size
+        self.n_probe = n_probe
+        self.retrain_growth = retrain_growth
+        self.centroids = None
+        self.trained_size = 0
+        self.list_ids = [np.empty(0, dtype=np.int64)]
+        self.list_vectors = [np.empty((0, dimensions), dtype=np.float32)]
+        self.locations = {}
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, item_id):
+        return item_id in self.locations
+
+    def ids(self):
+        return set(self.locations)
+
+    def add(self, item_id, vector):
+        self.add_many([item_id], [vector])
+
+    def add_many(self, item_ids, vectors):
+        """Insert or replace vectors; existing ids are moved to their new bucket"""
+        if not len(item_ids):
+            return
+        for item_id in item_ids:
+            self.remove(item_id)
+
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        vectors = normalize(vectors)
+        assignments = self._assign(vectors)
+
+        for list_no in np.unique(assignments):
+            rows = assignments == list_no
+            self.list_ids[list_no] = np.concatenate([self.list_ids[list_no], item_ids[rows]])
+            self.list_vectors[list_no] = np.vstack([self.list_vectors[list_no], vectors[rows]])
+        self.locations.update(zip(item_ids.tolist(), assignments.tolist()))
+
+        if self._needs_training():
+            self.train()
+
+    def remove(self, item_id):
+        list_no = self.locations.pop(item_id, None)
+        if list_no is None:
+            return False
+        keep = self.list_ids[list_no] != item_id
+        self.list_ids[list_no] = self.list_ids[list_no][keep]
+        self.list_vectors[list_no] = self.list_vectors[list_no][keep]
+        return True
+
+    def search(self, vector, k, allowed_ids=None):
+        """Return up to k (item_id, cosine score) pairs, best first.
+
+        With allowed_ids only those items are candidates, and buckets past
+        the n_probe closest are scanned, nearest first, until k of them have
+        been seen (or every bucket has).
+        """
+        if not self.locations or k <= 0:
+            return []
+
+        query = normalize(vector)[0]
+        if self.centroids is None:
+            order = [0]
+        else:
+            order = np.argsort(-(self.centroids @ query))
+        allowed = None
+        if allowed_ids is not None:
+            allowed = np.fromiter(allowed_ids, dtype=np.int64, count=len(allowed_ids))
+
+        probed_ids, probed_vectors, seen = [], [], 0
+        for probed, list_no in enumerate(order):
+            if probed >= self.n_probe and (allowed is None or seen >= k):
+                break
+            list_ids, list_vectors = self.list_ids[list_no], self.list_vectors[list_no]
+            if allowed is not None:
+                keep = np.isin(list_ids, allowed)
+                list_ids, list_vectors = list_ids[keep], list_vectors[keep]
+            probed_ids.append(list_ids)
+            probed_vectors.append(list_vectors)
+            seen += len(list_ids)
+
+        ids = np.concatenate(probed_ids)
+        if not len(ids):
+            return []
+        scores = np.vstack(probed_vectors) @ query
+
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(ids))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def train(self, iterations=10, sample_per_list=256, seed=0):
+        """Cluster the current vectors into ~sqrt(n) buckets and reassign everything"""
+        ids, vectors = self._all()
+        n_lists = max(1, int(np.sqrt(len(ids))))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(len(ids), n_lists * sample_per_list)
+        sample = vectors[rng.choice(len(ids), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)]
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_no in range(n_lists):
+                members = sample[labels == list_no]
+                if len(members):
+                    centroids[list_no] = members.mean(axis=0)
+            centroids = normalize(centroids)
+
+        self.centroids = centroids
+        self.trained_size = len(ids)
+        self._rebuild(ids, vectors)
+
+    def save(self, path):
+        """Write the index atomically so a crash never leaves a torn file.
+
+        Each save gets its own temp file, so processes saving the same index
+        at once cannot interleave their writes; the last rename wins.
+        """
+        ids, vectors = self._all()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                        prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    ids=ids,
+                    vectors=vectors,
+                    assignments=np.array([self.locations[i] for i in ids.tolist()], dtype=np.int64),
+                    centroids=self.centroids if self.centroids is not None
+                    else np.empty((0, self.dimensions), dtype=np.float32),
+                    trained_size=np.array(self.trained_size),
+                    synced_at=np.array(self.synced_at.isoformat() if self.synced_at else ""),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path) as data:
+            index = cls(data["vectors"].shape[1], **kwargs)
+            if len(data["centroids"]):
+                index.centroids = data["centroids"]
+                index.trained_size = int(data["trained_size"])
+            # Files written before synced_at existed are treated as never synced
+            if "synced_at" in data.files and str(data["synced_at"]):
+                index.synced_at = datetime.fromisoformat(str(data["synced_at"]))
+            index._rebuild(data["ids"], data["vectors"], data["assignments"])
+        return index
+
+    def _assign(self, vectors):
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def _needs_training(self):
+        if self.centroids is None:
+            return len(self) >= self.min_train_size
+        return len(self) >= self.trained_size * self.retrain_growth
+
+    def _all(self):
+        ids = np.concatenate(self.list_ids)
+        vectors = np.vstack(self.list_vectors)
+        return ids, vectors
+
+    def _rebuild(self, ids, vectors, assignments=None):
+        if assignments is None:
+            assignments = np.concatenate([
+                self._assign(vectors[start:start + 4096])
+                for start in range(0, len(vectors), 4096)
+            ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+        n_lists = 1 if self.centroids is None else len(self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.list_ids = [ids[order[bounds[i]:bounds[i + 1]]] for i in range(n_lists)]
+        self.list_vectors = [vectors[order[bounds[i]:bounds[i + 1]]] for i in range(n_lists)]
+        self.locations = dict(zip(ids.tolist(), assignments.tolist()))
@@ -26,6 +26,17 @@ config.set_main_option(
         '%', '%%'))
 target_metadata = current_app.extensions['migrate'].db.metadata
 
+# The post_fts full-text index (and the shadow tables FTS5 keeps for it) is
+# created by raw DDL in its migration, not by the models; without this
+# autogenerate would see it as a removed table and drop it
+FTS_TABLE = 'post_fts'
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and (name == FTS_TABLE or name.startswith(FTS_TABLE + '_')):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -46,7 +57,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True
+        url=url, target_metadata=target_metadata, literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -78,6 +90,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
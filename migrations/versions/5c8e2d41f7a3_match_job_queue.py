@@ -0,0 +1,40 @@
+"""match job queue
+
+Revision ID: 5c8e2d41f7a3
+Revises: a3f1c9e27b40
+Create Date: 2026-10-18 11:02:37.540914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e2d41f7a3'
+down_revision = 'a3f1c9e27b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('match_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('claimed_by', sa.String(length=36), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('match_job', schema=None) as batch_op:
+        batch_op.create_index('ix_match_job_status_id', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('match_job', schema=None) as batch_op:
+        batch_op.drop_index('ix_match_job_status_id')
+
+    op.drop_table('match_job')
@@ -0,0 +1,37 @@
+"""composite indexes for hot queries
+
+Revision ID: 8e6b3f0d2c57
+Revises: d7b04e6a19c2
+Create Date: 2026-10-18 12:31:50.118402
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e6b3f0d2c57'
+down_revision = 'd7b04e6a19c2'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('post', 'ix_post_type_post_date', ['type', 'post_date']),
+    ('post', 'ix_post_user_id_type', ['user_id', 'type']),
+    ('post', 'ix_post_post_date', ['post_date']),
+    ('notification', 'ix_notification_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at']),
+    ('chat', 'ix_chat_receiver_id_is_read', ['receiver_id', 'is_read']),
+    ('chat', 'ix_chat_post_id_created_at', ['post_id', 'created_at']),
+    ('chat', 'ix_chat_sender_id', ['sender_id']),
+    ('verification_claim', 'ix_verification_claim_post_id_user_id_status', ['post_id', 'user_id', 'status']),
+]
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,36 @@
+"""post embedding store
+
+Revision ID: a3f1c9e27b40
+Revises: 270511160ea3
+Create Date: 2026-10-18 10:12:04.318227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c9e27b40'
+down_revision = '270511160ea3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing posts are embedded lazily the first time matching sees them
+    op.create_table('post_embedding',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('model_name', sa.String(length=100), nullable=False),
+    sa.Column('text_hash', sa.String(length=40), nullable=False),
+    sa.Column('dimensions', sa.Integer(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('post_id')
+    )
+
+
+def downgrade():
+    op.drop_table('post_embedding')
@@ -0,0 +1,31 @@
+"""scored_at and score index on verification_claim
+
+Revision ID: a7c3e9d15f28
+Revises: f2d8a6c41b93
+Create Date: 2026-10-18 16:20:41.906512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9d15f28'
+down_revision = 'f2d8a6c41b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing claims start unscored, so the worker scores them on its next pass
+    with op.batch_alter_table('verification_claim', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scored_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_verification_claim_post_id_verification_score', ['post_id', 'verification_score'], unique=False)
+        batch_op.create_index('ix_verification_claim_scored_at', ['scored_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('verification_claim', schema=None) as batch_op:
+        batch_op.drop_index('ix_verification_claim_scored_at')
+        batch_op.drop_index('ix_verification_claim_post_id_verification_score')
+        batch_op.drop_column('scored_at')
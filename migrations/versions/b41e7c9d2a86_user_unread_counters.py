@@ -0,0 +1,37 @@
+"""denormalized unread counters on user
+
+Revision ID: b41e7c9d2a86
+Revises: 8e6b3f0d2c57
+Create Date: 2026-10-18 13:05:27.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e7c9d2a86'
+down_revision = '8e6b3f0d2c57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notifications_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('unread_chats_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the source tables so the counters start out exact
+    op.execute(
+        'UPDATE "user" SET '
+        'unread_notifications_count = (SELECT COUNT(*) FROM notification '
+        'WHERE notification.user_id = "user".id AND notification.is_read = 0), '
+        'unread_chats_count = (SELECT COUNT(*) FROM chat '
+        'WHERE chat.receiver_id = "user".id AND chat.is_read = 0)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('unread_chats_count')
+        batch_op.drop_column('unread_notifications_count')
@@ -0,0 +1,26 @@
+"""client_id on chat for write-behind messages
+
+Revision ID: b8e4d1a6f352
+Revises: e5b9d2f7a061
+Create Date: 2026-10-18 18:21:37.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4d1a6f352'
+down_revision = 'e5b9d2f7a061'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_id', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.drop_column('client_id')
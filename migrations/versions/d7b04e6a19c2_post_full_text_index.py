@@ -0,0 +1,47 @@
+"""post full text index
+
+Revision ID: d7b04e6a19c2
+Revises: 5c8e2d41f7a3
+Create Date: 2026-10-18 11:48:15.206631
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b04e6a19c2'
+down_revision = '5c8e2d41f7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+        item_name, description, category_name, location,
+        content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN
+        INSERT INTO post_fts(rowid, item_name, description, category_name, location)
+        VALUES (new.id, new.item_name, new.description, new.category_name, new.location);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, item_name, description, category_name, location)
+        VALUES ('delete', old.id, old.item_name, old.description, old.category_name, old.location);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS post_fts_au
+    AFTER UPDATE OF item_name, description, category_name, location ON post BEGIN
+        INSERT INTO post_fts(post_fts, rowid, item_name, description, category_name, location)
+        VALUES ('delete', old.id, old.item_name, old.description, old.category_name, old.location);
+        INSERT INTO post_fts(rowid, item_name, description, category_name, location)
+        VALUES (new.id, new.item_name, new.description, new.category_name, new.location);
+    END""")
+
+    # Backfill the index from the rows already in post
+    op.execute("INSERT INTO post_fts(post_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS post_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS post_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS post_fts_ai")
+    op.execute("DROP TABLE IF EXISTS post_fts")
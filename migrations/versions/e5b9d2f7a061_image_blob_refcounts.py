@@ -0,0 +1,44 @@
+"""image_blob reference counts for content-addressed uploads
+
+Revision ID: e5b9d2f7a061
+Revises: a7c3e9d15f28
+Create Date: 2026-10-18 17:04:52.117630
+
+"""
+from collections import Counter
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b9d2f7a061'
+down_revision = 'a7c3e9d15f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    image_blob = op.create_table('image_blob',
+    sa.Column('filename', sa.String(length=100), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('filename')
+    )
+
+    # Existing (uuid-named) uploads are counted too, so deleting a post
+    # releases them the same way as new content-addressed ones
+    connection = op.get_bind()
+    counts = Counter()
+    for (images,) in connection.execute(sa.text('SELECT images FROM post WHERE images IS NOT NULL')):
+        counts.update(name for name in images.split(',') if name)
+    for (filename,) in connection.execute(sa.text('SELECT filename FROM claim_proof_file')):
+        counts[filename] += 1
+    if counts:
+        now = datetime.utcnow()
+        op.bulk_insert(image_blob, [{'filename': name, 'ref_count': count, 'updated_at': now}
+                                    for name, count in counts.items()])
+
+
+def downgrade():
+    op.drop_table('image_blob')
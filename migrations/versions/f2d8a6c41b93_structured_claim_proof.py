@@ -0,0 +1,107 @@
+"""structured claim proof instead of the proof_details JSON
+
+Revision ID: f2d8a6c41b93
+Revises: c9a2f5e81d34
+Create Date: 2026-10-18 15:52:10.318204
+
+"""
+import json
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d8a6c41b93'
+down_revision = 'c9a2f5e81d34'
+branch_labels = None
+depends_on = None
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade():
+    op.create_table('claim_proof_file',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('claim_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['claim_id'], ['verification_claim.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('claim_proof_file', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_claim_proof_file_claim_id'), ['claim_id'], unique=False)
+
+    with op.batch_alter_table('verification_claim', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lost_location', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('lost_date', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('unique_identifier', sa.String(length=500), nullable=True))
+        batch_op.add_column(sa.Column('additional_proof', sa.String(length=1000), nullable=True))
+
+    # Backfill from the JSON; rows that don't parse keep empty proof
+    claims = sa.table('verification_claim',
+                      sa.column('id', sa.Integer), sa.column('lost_location', sa.String),
+                      sa.column('lost_date', sa.Date), sa.column('unique_identifier', sa.String),
+                      sa.column('additional_proof', sa.String))
+    proof_files = sa.table('claim_proof_file',
+                           sa.column('claim_id', sa.Integer), sa.column('filename', sa.String))
+    connection = op.get_bind()
+    files = []
+    for claim_id, details in connection.execute(
+            sa.text('SELECT id, proof_details FROM verification_claim WHERE proof_details IS NOT NULL')):
+        try:
+            data = json.loads(details)
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        connection.execute(claims.update().where(claims.c.id == claim_id).values(
+            lost_location=data.get('lost_location'),
+            lost_date=_parse_date(data.get('lost_date')),
+            unique_identifier=data.get('unique_identifier'),
+            additional_proof=data.get('additional_proof'),
+        ))
+        files.extend({'claim_id': claim_id, 'filename': filename}
+                     for filename in data.get('proof_files') or [] if filename)
+    if files:
+        connection.execute(proof_files.insert(), files)
+
+    with op.batch_alter_table('verification_claim', schema=None) as batch_op:
+        batch_op.drop_column('proof_details')
+
+
+def downgrade():
+    with op.batch_alter_table('verification_claim', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('proof_details', sa.String(length=1000), nullable=True))
+
+    connection = op.get_bind()
+    files = {}
+    for claim_id, filename in connection.execute(
+            sa.text('SELECT claim_id, filename FROM claim_proof_file ORDER BY id')):
+        files.setdefault(claim_id, []).append(filename)
+    for claim_id, location, lost_date, identifier, additional in connection.execute(sa.text(
+            'SELECT id, lost_location, lost_date, unique_identifier, additional_proof FROM verification_claim')):
+        connection.execute(
+            sa.text('UPDATE verification_claim SET proof_details = :details WHERE id = :id'),
+            {'id': claim_id, 'details': json.dumps({
+                'lost_location': location,
+                'lost_date': str(lost_date) if lost_date else None,
+                'unique_identifier': identifier,
+                'additional_proof': additional,
+                'proof_files': files.get(claim_id, []),
+            })})
+
+    with op.batch_alter_table('verification_claim', schema=None) as batch_op:
+        batch_op.drop_column('additional_proof')
+        batch_op.drop_column('unique_identifier')
+        batch_op.drop_column('lost_date')
+        batch_op.drop_column('lost_location')
+
+    with op.batch_alter_table('claim_proof_file', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_claim_proof_file_claim_id'))
+
+    op.drop_table('claim_proof_file')
@@ -2,6 +2,7 @@ from app import app, db, socketio
 from app.models.user import User
 from werkzeug.security import generate_password_hash
 from flask_migrate import upgrade
+from app.services.match_worker_service import start_match_worker
 
 def create_default_users():
     if not User.query.filter_by(email="admin@test.com").first():
@@ -30,4 +31,6 @@ if __name__ == "__main__":
     with app.app_context():
         db.create_all()
         create_default_users()
+    if app.config["MATCH_WORKER_MODE"] == "inprocess":
+        start_match_worker(app, socketio)
     socketio.run(app, debug=True)
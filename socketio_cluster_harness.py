@@ -0,0 +1,208 @@
+"""Check that Socket.IO room emits cross workers through the message queue.
+
+Starts a local broker, N app workers on their own ports (all on a copy of the
+database), and python-socketio clients spread across the workers, then checks
+that chat messages, messages_read and notification pushes reach clients on a
+different worker than the one that emitted them. The push is made by a real
+`flask match-worker --once` run, matching a post queued for the check.
+
+    pip install "python-socketio[client]"
+    python socketio_cluster_harness.py --workers 3
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DB = os.path.join(ROOT, "instance", "lostandfound.db")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+def serve(port):
+    """Worker process entry point"""
+    try:
+        import eventlet
+        eventlet.monkey_patch()
+    except ImportError:
+        pass
+    from app import app, socketio
+    socketio.run(app, host="127.0.0.1", port=port, allow_unsafe_werkzeug=True)
+
+
+def pick_chat(database):
+    """A lost post (anyone may chat about it) and two distinct users"""
+    with sqlite3.connect(database) as conn:
+        post_id, owner_id = conn.execute(
+            "SELECT id, user_id FROM post WHERE type = 'lost' ORDER BY id LIMIT 1").fetchone()
+        other_id = conn.execute(
+            "SELECT id FROM user WHERE id != ? ORDER BY id LIMIT 1", (owner_id,)).fetchone()[0]
+    return post_id, owner_id, other_id
+
+
+def queue_match(database, post_id, user_id):
+    """Copy a lost post as `user_id`'s found post and queue the copy for
+    matching, so the worker pairs them and notifies the lost post's owner.
+    Returns the found post's id."""
+    columns = "item_name, description, category_name, location, lOrF_date"
+    now = datetime.utcnow().isoformat(sep=" ")
+    with sqlite3.connect(database) as conn:
+        row = conn.execute(f"SELECT {columns} FROM post WHERE id = ?", (post_id,)).fetchone()
+        found_id = conn.execute(
+            f"INSERT INTO post ({columns}, user_id, type, status, post_date, share_count, verification_status) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'found', 1, ?, 0, 'pending')", (*row, user_id, now)).lastrowid
+        conn.execute("INSERT INTO match_job (post_id, status, attempts, created_at) "
+                     "VALUES (?, 'pending', 0, ?)", (found_id, now))
+    return found_id
+
+
+class Probe:
+    """A socketio client that records the events it receives"""
+
+    def __init__(self, name, url, cookie):
+        import socketio
+        self.name = name
+        self.events = []
+        self.received = threading.Condition()
+        self.client = socketio.Client()
+        self.client.on("*", self._record)
+        self.client.connect(url, headers={"Cookie": cookie}, transports=["websocket"])
+
+    def _record(self, event, data=None):
+        with self.received:
+            self.events.append((event, data))
+            self.received.notify_all()
+
+    def wait_for(self, event, predicate=lambda data: True, timeout=5):
+        deadline = time.monotonic() + timeout
+        with self.received:
+            while True:
+                for name, data in self.events:
+                    if name == event and predicate(data):
+                        return data
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.received.wait(remaining)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve)
+    if args.workers < 2:
+        parser.error("--workers must be at least 2")
+
+    workdir = tempfile.mkdtemp(prefix="socketio-cluster-")
+    database = os.path.join(workdir, "lostandfound.db")
+    shutil.copy(SOURCE_DB, database)
+    queue_url = f"local://127.0.0.1:{free_port()}"
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database}",
+        "SOCKETIO_MESSAGE_QUEUE": queue_url,
+        "MATCH_WORKER_MODE": "external",
+    })
+
+    from flask_migrate import upgrade
+    from app import app
+    from app.utils.socket_queue import LocalBroker
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, "migrations"))
+
+    broker = LocalBroker(("127.0.0.1", urlparse(queue_url).port))
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+
+    ports = [free_port() for _ in range(args.workers)]
+    workers = [subprocess.Popen([sys.executable, __file__, "--serve", str(port)], cwd=ROOT)
+               for port in ports]
+    probes = []
+    failures = []
+    try:
+        for port in ports:
+            wait_for_port(port)
+
+        serializer = app.session_interface.get_signing_serializer(app)
+        cookie_name = app.config["SESSION_COOKIE_NAME"]
+
+        def cookie(user_id):
+            return f"{cookie_name}={serializer.dumps({'user_id': user_id})}"
+
+        post_id, owner_id, other_id = pick_chat(database)
+        # Each user on a different worker
+        owner = Probe("owner", f"http://127.0.0.1:{ports[0]}", cookie(owner_id))
+        other = Probe("other", f"http://127.0.0.1:{ports[1]}", cookie(other_id))
+        probes = [owner, other]
+        for probe in probes:
+            probe.client.emit("join", {"post_id": post_id})
+        time.sleep(0.5)
+
+        def check(name, result):
+            print(f"{'ok  ' if result is not None else 'FAIL'} {name}")
+            if result is None:
+                failures.append(name)
+
+        text = f"cluster check {time.time()}"
+        owner.client.emit("message", {"post_id": post_id, "receiver_id": other_id, "message": text})
+        check("chat message reaches the other worker",
+              other.wait_for("message", lambda data: data["message"] == text))
+
+        other.client.emit("mark_read", {"post_id": post_id})
+        check("messages_read reaches the other worker",
+              owner.wait_for("messages_read", lambda data: data["reader_id"] == other_id))
+
+        # The match worker runs no Socket.IO server; its pushes go through the queue
+        found_id = queue_match(database, post_id, other_id)
+        worker = subprocess.run([sys.executable, "-m", "flask", "--app", "app", "match-worker", "--once"],
+                                cwd=ROOT, capture_output=True, text=True, timeout=600)
+        if worker.returncode:
+            print(worker.stderr, file=sys.stderr)
+        link = f"/posts/post/{found_id}"
+        check("match worker notification reaches a user room",
+              owner.wait_for("notifications",
+                             lambda data: any(n["link"] == link for n in data["notifications"]),
+                             timeout=10))
+    finally:
+        for probe in probes:
+            probe.client.disconnect()
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        broker.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{len(failures)} of 3 checks failed" if failures else "All cluster checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+"""Load-test the chat Socket.IO events and write the results as JSON.
+
+Seeds a copy of the database with found posts, each with an approved claim,
+starts the app (optionally several workers behind the local broker) and
+drives one owner/claimer client pair per post with python-socketio. Pairs
+join their post room, trade messages as fast as the acks come back, then
+mark their messages read.
+
+Client side it measures ack latency for `join`, `message` and `mark_read`,
+fan-out latency (send to arrival at the other client) for `message` and
+`messages_read`, and events per second. Each worker reports its handler
+timings, how long its write transactions took to commit and how often
+SQLite reported the database as locked.
+
+    pip install "python-socketio[client]"
+    python socketio_load_test.py --pairs 25 --messages 40 --output results.json
+    python socketio_load_test.py --baseline results.json  # compare a later run
+
+Exits non-zero if any event errored or a fan-out never arrived.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from socketio_cluster_harness import SOURCE_DB, ROOT, free_port, wait_for_port
+
+ACK_TIMEOUT = 10
+FAN_OUT_TIMEOUT = 10
+
+
+def percentiles(samples):
+    """count, mean and p50/p90/p95/p99/max in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    values = sorted(samples)
+
+    def at(fraction):
+        return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000,
+        "p50_ms": at(0.50),
+        "p90_ms": at(0.90),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": values[-1] * 1000,
+    }
+
+
+def serve(port, stats_path):
+    """Worker process entry point; writes its stats to `stats_path` on SIGTERM"""
+    try:
+        import eventlet
+        eventlet.monkey_patch()
+    except ImportError:
+        pass
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from app import app, db, socketio
+    from app.utils.event_metrics import EventLatency
+
+    # Keep every handler sample for the report, not just the rolling window
+    EventLatency.SAMPLES = 10 ** 7
+    commits = []
+    locked = [0]
+    lock = threading.Lock()
+
+    @event.listens_for(Session, "do_orm_execute")
+    def mark_orm_write(state):
+        if state.is_insert or state.is_update or state.is_delete:
+            state.session.info["load_test_wrote"] = True
+
+    @event.listens_for(Session, "after_flush")
+    def mark_flush(session, flush_context):
+        session.info["load_test_wrote"] = True
+
+    @event.listens_for(Session, "before_commit")
+    def commit_started(session):
+        session.info["load_test_commit_started"] = time.perf_counter()
+
+    @event.listens_for(Session, "after_commit")
+    def commit_finished(session):
+        started = session.info.pop("load_test_commit_started", None)
+        if session.info.pop("load_test_wrote", False) and started is not None:
+            with lock:
+                commits.append(time.perf_counter() - started)
+
+    @event.listens_for(Session, "after_rollback")
+    def rolled_back(session):
+        session.info.pop("load_test_commit_started", None)
+        session.info.pop("load_test_wrote", None)
+
+    with app.app_context():
+        @event.listens_for(db.engine, "handle_error")
+        def count_lock_errors(context):
+            if "database is locked" in str(context.original_exception):
+                with lock:
+                    locked[0] += 1
+
+    def write_stats(signum, frame):
+        with lock:
+            stats = {
+                "handlers": EventLatency.snapshot(),
+                "commits": percentiles(commits),
+                "database_locked_errors": locked[0],
+            }
+        with open(stats_path, "w") as f:
+            json.dump(stats, f)
+        # SystemExit also runs atexit, so a write-behind buffer is flushed
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, write_stats)
+    socketio.run(app, host="127.0.0.1", port=port, allow_unsafe_werkzeug=True)
+
+
+def seed(pairs):
+    """Create `pairs` owner/claimer users, a found post each and an approved claim"""
+    from werkzeug.security import generate_password_hash
+    from app import app, db
+    from app.models.post import Post
+    from app.models.user import User
+    from app.models.verificationClaim import VerificationClaim
+
+    password = generate_password_hash("load-test")
+    stamp = int(time.time())
+    with app.app_context():
+        users = [User(name=f"Load {role} {i}", email=f"load-{stamp}-{role}-{i}@example.com",
+                      password=password)
+                 for i in range(pairs) for role in ("owner", "claimer")]
+        db.session.add_all(users)
+        db.session.flush()
+        conversations = []
+        for i in range(pairs):
+            owner, claimer = users[2 * i], users[2 * i + 1]
+            post = Post(user_id=owner.id, type="found", item_name=f"Load test item {i}",
+                        description="Seeded by socketio_load_test.py", category_name="Keys",
+                        location="Library", lOrF_date=datetime.utcnow())
+            db.session.add(post)
+            db.session.flush()
+            db.session.add(VerificationClaim(post_id=post.id, user_id=claimer.id, status="approved",
+                                             verification_score=1.0))
+            conversations.append((post.id, owner.id, claimer.id))
+        db.session.commit()
+    return conversations
+
+
+class Participant:
+    """One side of a conversation: a socketio client that times what it receives"""
+
+    def __init__(self, url, cookie, results):
+        import socketio
+        self.results = results
+        self.pending = {}
+        self.arrived = threading.Condition()
+        self.client = socketio.Client()
+        self.client.on("message", self._on_message)
+        self.client.on("messages_read", self._on_messages_read)
+        self.client.connect(url, headers={"Cookie": cookie}, transports=["websocket"])
+
+    def expect(self, key):
+        """Register a fan-out the peer is about to cause"""
+        with self.arrived:
+            self.pending[key] = time.perf_counter()
+
+    def forget(self, key):
+        """Drop an expected fan-out the peer turned out not to cause"""
+        with self.arrived:
+            self.pending.pop(key, None)
+
+    def _arrived(self, key, kind):
+        now = time.perf_counter()
+        with self.arrived:
+            sent = self.pending.pop(key, None)
+            self.arrived.notify_all()
+        if sent is not None:
+            self.results.record(kind, now - sent)
+
+    def _on_message(self, data):
+        self._arrived(("message", data.get("message")), "message_fan_out")
+
+    def _on_messages_read(self, data):
+        self._arrived(("messages_read", data.get("reader_id")), "messages_read_fan_out")
+
+    def wait_drained(self, timeout):
+        """Wait for all expected fan-outs; returns how many never arrived"""
+        deadline = time.monotonic() + timeout
+        with self.arrived:
+            while self.pending and time.monotonic() < deadline:
+                self.arrived.wait(deadline - time.monotonic())
+            missing = len(self.pending)
+            self.pending.clear()
+        return missing
+
+    def call(self, kind, event, data):
+        started = time.perf_counter()
+        try:
+            response = self.client.call(event, data, timeout=ACK_TIMEOUT)
+        except Exception:
+            self.results.error(kind)
+            return None
+        self.results.record(kind, time.perf_counter() - started)
+        return response
+
+
+class Results:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self.lock:
+            self.samples.setdefault(kind, []).append(seconds)
+
+    def error(self, kind, count=1):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + count
+
+
+def run_pair(conversation, urls, cookie, messages, barrier, results):
+    post_id, owner_id, claimer_id = conversation
+    owner = claimer = None
+    try:
+        owner = Participant(urls[0], cookie(owner_id), results)
+        claimer = Participant(urls[1 % len(urls)], cookie(claimer_id), results)
+        sides = [(owner, claimer, claimer_id), (claimer, owner, owner_id)]
+        for participant in (owner, claimer):
+            participant.call("join_ack", "join", {"post_id": post_id})
+        barrier.wait()
+
+        received = {owner: 0, claimer: 0}
+        for i in range(messages):
+            sender, receiver, receiver_id = sides[i % 2]
+            text = f"load {post_id} {i}"
+            receiver.expect(("message", text))
+            if sender.call("message_ack", "message",
+                           {"post_id": post_id, "receiver_id": receiver_id, "message": text}):
+                received[receiver] += 1
+            else:
+                receiver.forget(("message", text))
+                results.error("message_rejected")
+        barrier.wait()
+
+        for reader, peer, _ in sides:
+            # mark_read only fans out when it flipped something, so a reader
+            # nobody wrote to (e.g. the owner with --messages 1) is not timed
+            if received[reader]:
+                # Only the peer is timed; the reader's own copy of the event is ignored
+                peer.expect(("messages_read", owner_id if reader is owner else claimer_id))
+            reader.call("mark_read_ack", "mark_read", {"post_id": post_id})
+        for participant in (owner, claimer):
+            missing = participant.wait_drained(FAN_OUT_TIMEOUT)
+            if missing:
+                results.error("fan_out_missing", missing)
+    except threading.BrokenBarrierError:
+        results.error("pair_aborted")
+    except Exception:
+        # Don't leave the other pairs waiting at a barrier this one will never reach
+        barrier.abort()
+        results.error("pair_failed")
+        raise
+    finally:
+        for participant in (owner, claimer):
+            if participant is not None:
+                participant.client.disconnect()
+
+
+def compare(current, baseline):
+    """Print p95 and throughput changes against an earlier results file"""
+    print(f"\nAgainst {baseline['started_at']}:")
+    for kind, stats in current["client"].items():
+        before = baseline["client"].get(kind, {})
+        if stats.get("count") and before.get("count"):
+            change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            print(f"  {kind:24} p95 {before['p95_ms']:8.1f} -> {stats['p95_ms']:8.1f} ms ({change:+.0f}%)")
+    for key in ("messages_per_second", "deliveries_per_second"):
+        before, after = baseline["throughput"][key], current["throughput"][key]
+        change = (after - before) / before * 100 if before else 0
+        print(f"  {key:24} {before:8.1f} -> {after:8.1f} ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=20, help="conversations, two clients each")
+    parser.add_argument("--messages", type=int, default=30, help="messages per conversation")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--write-behind", action="store_true", help="run with CHAT_WRITE_BEHIND=1")
+    parser.add_argument("--output", default="socketio_load_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--stats", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.stats)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="socketio-load-")
+    database = os.path.join(workdir, "lostandfound.db")
+    shutil.copy(SOURCE_DB, database)
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database}",
+        "MATCH_WORKER_MODE": "external",
+        "CHAT_WRITE_BEHIND": "1" if args.write_behind else "0",
+    })
+    broker = None
+    if args.workers > 1:
+        os.environ["SOCKETIO_MESSAGE_QUEUE"] = f"local://127.0.0.1:{free_port()}"
+
+    from flask_migrate import upgrade
+    from app import app
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, "migrations"))
+    conversations = seed(args.pairs)
+
+    if args.workers > 1:
+        from app.utils.socket_queue import LocalBroker
+        broker = LocalBroker(("127.0.0.1", urlparse(os.environ["SOCKETIO_MESSAGE_QUEUE"]).port))
+        threading.Thread(target=broker.serve_forever, daemon=True).start()
+
+    ports = [free_port() for _ in range(args.workers)]
+    stats_paths = [os.path.join(workdir, f"worker-{port}.json") for port in ports]
+    workers = [subprocess.Popen([sys.executable, __file__, "--serve", str(port), "--stats", path], cwd=ROOT)
+               for port, path in zip(ports, stats_paths)]
+    results = Results()
+    try:
+        for port in ports:
+            wait_for_port(port)
+        urls = [f"http://127.0.0.1:{port}" for port in ports]
+        serializer = app.session_interface.get_signing_serializer(app)
+        cookie_name = app.config["SESSION_COOKIE_NAME"]
+
+        def cookie(user_id):
+            return f"{cookie_name}={serializer.dumps({'user_id': user_id})}"
+
+        # Both barrier phases start when every pair is ready, plus this thread
+        barrier = threading.Barrier(len(conversations) + 1, timeout=300)
+        threads = [threading.Thread(target=run_pair, daemon=True,
+                                    args=(conversation, urls[i % len(urls):] + urls[:i % len(urls)],
+                                          cookie, args.messages, barrier, results))
+                   for i, conversation in enumerate(conversations)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        barrier.wait()
+        elapsed = time.perf_counter() - started
+        for thread in threads:
+            thread.join()
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        if broker:
+            broker.shutdown()
+
+    worker_stats = []
+    for path in stats_paths:
+        if os.path.exists(path):
+            with open(path) as f:
+                worker_stats.append(json.load(f))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    sent = len(results.samples.get("message_ack", []))
+    delivered = len(results.samples.get("message_fan_out", []))
+    report = {
+        "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "config": {
+            "pairs": args.pairs,
+            "messages_per_pair": args.messages,
+            "workers": args.workers,
+            "write_behind": args.write_behind,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "client": {kind: percentiles(samples) for kind, samples in sorted(results.samples.items())},
+        "throughput": {
+            "message_phase_seconds": elapsed,
+            "messages_per_second": sent / elapsed if elapsed else 0,
+            "deliveries_per_second": delivered / elapsed if elapsed else 0,
+        },
+        "errors": results.errors,
+        "workers": worker_stats,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for kind, stats in report["client"].items():
+        print(f"{kind:24} n={stats['count']:6}  p50 {stats['p50_ms']:8.1f}  "
+              f"p95 {stats['p95_ms']:8.1f}  p99 {stats['p99_ms']:8.1f}  max {stats['max_ms']:8.1f} ms")
+    print(f"{sent / elapsed if elapsed else 0:.1f} messages/s, "
+          f"{delivered / elapsed if elapsed else 0:.1f} deliveries/s")
+    for i, stats in enumerate(worker_stats):
+        commits = stats["commits"]
+        if commits["count"]:
+            print(f"worker {i}: {commits['count']} commits, p95 {commits['p95_ms']:.1f} ms, "
+                  f"max {commits['max_ms']:.1f} ms, {stats['database_locked_errors']} locked errors")
+    if results.errors:
+        print(f"Errors: {results.errors}")
+    print(f"Results written to {args.output}")
+
+    if baseline:
+        compare(report, baseline)
+    return 1 if results.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime
+
+# The app reads its configuration when it is imported, so point it at a
+# throwaway database before anything imports it
+TEST_DIR = tempfile.mkdtemp(prefix="lostandfound-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(TEST_DIR, "test.db")
+os.environ.pop("CHAT_WRITE_BEHIND", None)
+os.environ.pop("SOCKETIO_MESSAGE_QUEUE", None)
+
+import pytest
+from flask_migrate import stamp
+from werkzeug.security import generate_password_hash
+from app import app as flask_app, db
+from app.models.post import Post
+from app.models.user import User
+from app.models.verificationClaim import VerificationClaim
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The app on a fresh database, built the way run.py builds one"""
+    flask_app.config.update(
+        TESTING=True,
+        UPLOAD_FOLDER=os.path.join(TEST_DIR, "uploads"),
+        MATCH_INDEX_FOLDER=os.path.join(TEST_DIR, "match_index"),
+    )
+    os.makedirs(flask_app.config["UPLOAD_FOLDER"], exist_ok=True)
+    with flask_app.app_context():
+        db.create_all()
+        stamp()
+    yield flask_app
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield app
+        db.session.rollback()
+        db.session.remove()
+
+
+@pytest.fixture
+def make_user(app_context):
+    def make(**fields):
+        user = User(name=fields.pop("name", "Test User"),
+                    email=fields.pop("email", f"{uuid.uuid4().hex}@example.com"),
+                    password=generate_password_hash("password"), **fields)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_post(app_context):
+    def make(user, **fields):
+        post = Post(user_id=user.id, type=fields.pop("type", "found"),
+                    item_name=fields.pop("item_name", "Black umbrella"),
+                    description=fields.pop("description", "Left by the library entrance"),
+                    category_name=fields.pop("category_name", "Accessories"),
+                    location=fields.pop("location", "Library"),
+                    lOrF_date=fields.pop("lOrF_date", datetime.utcnow()), **fields)
+        db.session.add(post)
+        db.session.commit()
+        return post
+    return make
+
+
+@pytest.fixture
+def make_claim(app_context):
+    def make(post, user, **fields):
+        claim = VerificationClaim(post_id=post.id, user_id=user.id,
+                                  status=fields.pop("status", "pending"), **fields)
+        db.session.add(claim)
+        db.session.commit()
+        return claim
+    return make
@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime
+import pytest
+from app.models.chat import Chat
+from app.services.chat_service import ChatService
+from app.services.chat_write_buffer import ChatWriteBuffer
+
+
+@pytest.fixture
+def write_buffer(monkeypatch):
+    # Flushed by the test, not by the background loop
+    monkeypatch.setattr(ChatWriteBuffer, "_started", True)
+    monkeypatch.setattr(ChatWriteBuffer, "_pending", [])
+    return ChatWriteBuffer()
+
+
+def queued_row(post, sender, receiver_id, message):
+    return {'post_id': post.id, 'sender_id': sender.id, 'receiver_id': receiver_id,
+            'message': message, 'created_at': datetime.utcnow(), 'client_id': uuid.uuid4().hex}
+
+
+def test_bad_row_does_not_hold_back_its_batch(write_buffer, make_user, make_post):
+    owner, claimer = make_user(), make_user()
+    post = make_post(owner)
+    good = queued_row(post, claimer, owner.id, "Is it still there?")
+    write_buffer.queue(queued_row(post, claimer, None, "No receiver"))
+    write_buffer.queue(good)
+
+    assert write_buffer.flush() == 1
+
+    assert ChatWriteBuffer._pending == []
+    saved = Chat.query.filter_by(post_id=post.id).all()
+    assert [(chat.message, chat.client_id) for chat in saved] == [(good['message'], good['client_id'])]
+    # Nothing left to retry, so the next flush (as mark_read does) succeeds
+    assert write_buffer.flush() == 0
+
+
+def test_invalid_messages_are_rejected_before_queueing(app, write_buffer, make_user, make_post, monkeypatch):
+    monkeypatch.setitem(app.config, "CHAT_WRITE_BEHIND", True)
+    owner, claimer = make_user(), make_user()
+    post = make_post(owner, type="lost")
+    service = ChatService()
+
+    assert service.create_message(post.id, claimer.id, None, "hello") is None
+    assert service.create_message(post.id, claimer.id, "not-a-user", "hello") is None
+    assert service.create_message(post.id, claimer.id, 10 ** 9, "hello") is None
+    assert service.create_message(post.id, claimer.id, owner.id, "   ") is None
+    assert ChatWriteBuffer._pending == []
+
+    assert service.create_message(post.id, claimer.id, str(owner.id), "hello")['client_id']
+    assert [row['receiver_id'] for row in ChatWriteBuffer._pending] == [owner.id]
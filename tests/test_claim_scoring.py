@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from app.services.claim_scoring_service import ClaimScoringService
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    service = ClaimScoringService()
+    encoded = []
+
+    def encode_texts(texts):
+        encoded.extend(texts)
+        return np.ones((len(texts), 2), dtype=np.float32) if texts else None
+
+    monkeypatch.setattr(service.matching_service, "encode_texts", encode_texts)
+    monkeypatch.setattr(service.matching_service, "get_post_embeddings",
+                        lambda posts: {post.id: np.array([1.0, 0.0], dtype=np.float32) for post in posts})
+    service.encoded = encoded
+    return service
+
+
+def test_blank_claim_text_drops_the_text_component(scorer, make_user, make_post, make_claim):
+    owner, claimant = make_user(), make_user()
+    post = make_post(owner)
+    blank = make_claim(post, claimant, unique_identifier="   ", additional_proof="",
+                       lost_location=post.location, lost_date=post.lOrF_date.date())
+    worded = make_claim(post, claimant, unique_identifier="Wooden handle",
+                        lost_location=post.location, lost_date=post.lOrF_date.date())
+
+    scores = scorer.score_claims([blank, worded])
+
+    assert scorer.encoded == ["Wooden handle"]
+    # Place and date agree fully; with no text the weights renormalize to 1.0
+    assert scores[blank.id] == pytest.approx(1.0)
+    # cos 45 degrees for the text, full marks on place and date
+    expected = 0.6 * np.sqrt(0.5) + 0.2 + 0.2
+    assert scores[worded.id] == pytest.approx(expected, rel=1e-5)
@@ -0,0 +1,30 @@
+import io
+import os
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from app.utils.image_utils import save_image, variant_filename
+
+
+def mpo_upload():
+    """Two-frame MPO, the way many phone cameras save their JPEGs"""
+    buffer = io.BytesIO()
+    first, second = Image.new('RGB', (64, 48), 'red'), Image.new('RGB', (64, 48), 'blue')
+    first.save(buffer, 'MPO', save_all=True, append_images=[second])
+    buffer.seek(0)
+    assert Image.open(buffer).format == 'MPO'
+    buffer.seek(0)
+    return FileStorage(stream=buffer, filename="IMG_0001.jpg", content_type="image/jpeg")
+
+
+def test_mpo_upload_is_stored_as_jpeg(app):
+    with app.test_request_context():
+        filename = save_image(mpo_upload())
+
+    assert filename and filename.endswith('.jpg')
+    folder = app.config["UPLOAD_FOLDER"]
+    with Image.open(os.path.join(folder, filename)) as stored:
+        assert stored.format == 'JPEG'
+        assert stored.size == (64, 48)
+        assert stored.getpixel((32, 24))[0] > 200
+    for variant in app.config["IMAGE_VARIANTS"]:
+        assert os.path.exists(os.path.join(folder, variant_filename(filename, variant)))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from app import db
+from app.repositories.embedding_repository import EmbeddingRepository
+from app.services.match_index_service import MatchIndexService
+from app.services.matching_service import MODEL_NAME, MatchingService
+
+
+class FakeModel:
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, show_progress_bar=False):
+        return np.tile([1.0, 1.0], (len(texts), 1))
+
+
+@pytest.fixture
+def matching(app, monkeypatch, tmp_path):
+    monkeypatch.setattr(MatchingService, "model", property(lambda self: FakeModel()))
+    monkeypatch.setitem(app.config, "MATCH_INDEX_FOLDER", str(tmp_path))
+    for name in ("_indexes", "_paths", "_pending_changes"):
+        monkeypatch.setattr(MatchIndexService, name, {})
+    return MatchingService()
+
+
+def restart():
+    """Forget the loaded indexes, as a fresh process would"""
+    for registry in (MatchIndexService._indexes, MatchIndexService._paths, MatchIndexService._pending_changes):
+        registry.clear()
+
+
+def test_index_follows_edits_and_deletes_made_elsewhere(matching, make_user, make_post):
+    user = make_user()
+    kept, deleted = make_post(user, type="lost"), make_post(user, type="lost")
+    embeddings = EmbeddingRepository()
+    embeddings.create(kept.id, MODEL_NAME, "old", [1.0, 0.0])
+    embeddings.create(deleted.id, MODEL_NAME, "old", [0.0, 1.0])
+
+    assert matching.ensure_index("lost")
+    best, _ = matching.index_service.search("lost", [0.0, 1.0], 1)[0]
+    assert best == deleted.id
+
+    # Another process (the web app or the worker) edits one post and deletes
+    # the other; this process only learns about it from the database
+    restart()
+    embeddings.update(embeddings.get_by_post_id(kept.id), MODEL_NAME, "new", [0.0, 1.0])
+    db.session.delete(deleted)
+    db.session.commit()
+
+    assert matching.ensure_index("lost")
+    ids = MatchIndexService._indexes["lost"].ids()
+    assert kept.id in ids and deleted.id not in ids
+    best, score = matching.index_service.search("lost", [0.0, 1.0], 1)[0]
+    assert best == kept.id and score == pytest.approx(1.0)
@@ -0,0 +1,52 @@
+import pytest
+from app.repositories.notification_repository import NotificationRepository
+from app.services import notification_push_service
+from app.services.notification_push_service import NotificationPushService, user_room
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    events = []
+    monkeypatch.setattr(notification_push_service.socketio, "emit",
+                        lambda event, data, room=None: events.append((event, data, room)))
+    monkeypatch.setattr(NotificationPushService, "_pending", {})
+    monkeypatch.setattr(NotificationPushService, "_mode", NotificationPushService.DEFERRED)
+    return events
+
+
+def notify(user):
+    NotificationRepository().create_many([{'user_id': user.id, 'title': "Potential Match Found!",
+                                           'message': "We found a match", 'link': "/posts/post/1"}])
+
+
+def test_worker_pushes_right_after_the_batch(app, emitted, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, "SOCKETIO_MESSAGE_QUEUE", "redis://queue")
+    NotificationPushService.configure_for_worker()
+    user = make_user()
+
+    notify(user)
+    assert NotificationPushService().flush_pending() == 1
+
+    (event, data, room), = emitted
+    assert (event, room) == ('notifications', user_room(user.id))
+    assert [n['message'] for n in data['notifications']] == ["We found a match"]
+    assert data['notifications_count'] == 1
+
+
+def test_worker_without_a_queue_leaves_browsers_polling(app, emitted, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, "SOCKETIO_MESSAGE_QUEUE", None)
+    monkeypatch.setitem(app.config, "MATCH_WORKER_MODE", "external")
+    NotificationPushService.configure_for_worker()
+    user = make_user()
+
+    notify(user)
+    assert NotificationPushService().flush_pending() == 0
+    assert emitted == []
+    assert not NotificationPushService.pushes_reach_browsers()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
+    header = client.get('/dashboard/notifications/header').get_json()
+    assert header['notifications_count'] == 1
+    assert [n['message'] for n in header['notifications']] == ["We found a match"]
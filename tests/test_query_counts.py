@@ -0,0 +1,33 @@
+import pytest
+from flask import url_for
+from app import db
+from app.models.claim_proof_file import ClaimProofFile
+from app.utils.query_count import PAGE_QUERY_BUDGETS, count_statements
+
+
+@pytest.mark.parametrize("endpoint", sorted(PAGE_QUERY_BUDGETS))
+def test_claim_pages_issue_the_same_queries_for_more_claims(app, make_user, make_post, make_claim, endpoint):
+    owner = make_user()
+    post = make_post(owner)
+    with app.test_request_context():
+        path = url_for(endpoint, post_id=post.id) if endpoint == "verification.view_claims" else url_for(endpoint)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = owner.id
+
+    counts = []
+    # 2 claims, then 8
+    for new_claims in (2, 6):
+        for _ in range(new_claims):
+            claim = make_claim(post, make_user(), unique_identifier="Initials on the handle")
+            db.session.add(ClaimProofFile(claim_id=claim.id, filename=f"proof-{claim.id}.pdf"))
+            db.session.commit()
+        # Warm the header cache so only the page's own statements are counted
+        client.get(path)
+        with count_statements() as statements:
+            response = client.get(path)
+        assert response.status_code == 200
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1] <= PAGE_QUERY_BUDGETS[endpoint]
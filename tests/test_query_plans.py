@@ -0,0 +1,45 @@
+import pytest
+from app import db
+from app.models.chat import Chat
+from app.models.user_report import UserReport
+from app.repositories.notification_repository import NotificationRepository
+from app.utils.query_plan import FULL_SCAN, check_query_plans
+
+
+@pytest.mark.parametrize("step, table", [
+    ("SCAN post", "post"),
+    ("SCAN TABLE post", "post"),
+    ("SCAN post USING INDEX ix_post_post_date", "post"),
+    ("SCAN post USING COVERING INDEX ix_post_post_date", None),
+    ("SEARCH post USING INDEX ix_post_type_post_date (type=?)", None),
+    ("SEARCH post USING INTEGER PRIMARY KEY (rowid=?)", None),
+])
+def test_full_scan_pattern(step, table):
+    match = FULL_SCAN.match(step)
+    assert (match.group(1) if match else None) == table
+
+
+@pytest.fixture
+def seeded(make_user, make_post, make_claim):
+    """A few rows in every table the repositories read"""
+    users = [make_user() for _ in range(4)]
+    for owner, claimant in zip(users, users[1:] + users[:1]):
+        for post_type in ("lost", "found"):
+            post = make_post(owner, type=post_type, category_name="Keys")
+            claim = make_claim(post, claimant)
+            db.session.add(Chat(post_id=post.id, sender_id=claimant.id,
+                                receiver_id=owner.id, message="Is it still there?"))
+            db.session.add(UserReport(reporter_id=claimant.id, reported_user_id=owner.id,
+                                      post_id=post.id, claim_id=claim.id, type="post", reason="Spam"))
+        NotificationRepository().create_many([{'user_id': owner.id, 'title': "Potential Match Found!",
+                                               'message': "We found a match", 'link': "/posts/post/1"}])
+    db.session.commit()
+    return users
+
+
+def test_repository_queries_use_indexes(seeded):
+    results = check_query_plans()
+
+    assert results
+    failures = [(name, plan) for name, _, plan, scans, allowed in results if scans and not allowed]
+    assert failures == []
@@ -0,0 +1,26 @@
+from app import socketio, db
+from app.models.chat import Chat
+
+
+def connect(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
+    return socketio.test_client(app, flask_test_client=client)
+
+
+def test_join_ignores_a_last_seen_id_that_is_not_a_number(app, make_user, make_post, make_claim):
+    owner, claimer = make_user(), make_user()
+    post = make_post(owner)
+    make_claim(post, claimer, status='approved')
+    message = Chat(post_id=post.id, sender_id=owner.id, receiver_id=claimer.id, message="Found it")
+    db.session.add(message)
+    db.session.commit()
+    socket = connect(app, claimer)
+
+    socket.emit('join', {'post_id': post.id, 'last_seen_id': 'latest'})
+    assert socket.get_received() == []
+
+    socket.emit('join', {'post_id': str(post.id), 'last_seen_id': '0'})
+    (catch_up,) = [event for event in socket.get_received() if event['name'] == 'catch_up']
+    assert [m['id'] for m in catch_up['args'][0]['messages']] == [message.id]